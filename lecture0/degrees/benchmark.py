@@ -0,0 +1,222 @@
+"""
+Benchmark for degrees.shortest_path over random pairs of connected people.
+
+The data is loaded once, then the same pairs, sampled with a fixed seed
+from people in the same connected component, are searched with every
+strategy. For each strategy the latency percentiles, people expanded and
+peak frontier sizes are reported, as a table or as JSON. With --memory,
+peak allocation per query and per expanded person are reported too.
+
+Usage: python benchmark.py [directory] [-n N] [--seed S] [--methods M,...] [--memory] [--json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+
+# Latency percentiles reported for each method
+PERCENTILES = (50, 95, 99)
+
+
+def people_ids():
+    if degrees.graph is not None:
+        return [degrees.graph.person_id(p) for p in range(degrees.graph.num_people())]
+    return list(degrees.people)
+
+
+def components(ids):
+    """
+    Returns a dict mapping each person id to the lowest-numbered member
+    index of its connected component.
+    """
+    label = {}
+    for i, person_id in enumerate(ids):
+        if person_id in label:
+            continue
+        label[person_id] = i
+        frontier = [person_id]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for _, q in degrees.iter_neighbors(p, label):
+                    label[q] = i
+                    next_frontier.append(q)
+            frontier = next_frontier
+    return label
+
+
+def connected_pairs(ids, n, seed):
+    """
+    Returns n (source, target) pairs of distinct people with a path
+    between them, sampled with a fixed seed.
+    """
+    label = components(ids)
+    members = {}
+    for person_id in ids:
+        members.setdefault(label[person_id], []).append(person_id)
+    eligible = [person_id for person_id in ids if len(members[label[person_id]]) > 1]
+    if not eligible:
+        return []
+
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < n:
+        source = rng.choice(eligible)
+        target = rng.choice(members[label[source]])
+        if target != source:
+            pairs.append((source, target))
+    return pairs
+
+
+def run_query(source, target, method, memory=False):
+    """
+    Runs one search and returns its measurements. peak_bytes is only
+    measured while tracemalloc is tracing.
+    """
+    stats = {}
+    if memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start_time = time.perf_counter()
+    path = degrees.shortest_path(source, target, method=method, stats=stats)
+    elapsed = time.perf_counter() - start_time
+    result = {
+        "degrees": None if path is None else len(path),
+        "seconds": elapsed,
+        "expanded": stats.get("expanded", 0),
+        "peak_frontier": stats.get("peak_frontier", 0),
+    }
+    if memory:
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1] - baseline
+    return result
+
+
+def percentile(values, q):
+    """
+    Returns the nearest-rank q-th percentile of values.
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def summarize(results):
+    """
+    Aggregates the measurements of one method's queries.
+    """
+    latencies = [r["seconds"] * 1000 for r in results]
+    summary = {
+        "queries": len(results),
+        "latency_ms": {f"p{q}": round(percentile(latencies, q), 3) for q in PERCENTILES},
+        "total_seconds": round(sum(r["seconds"] for r in results), 6),
+    }
+    summary["latency_ms"]["mean"] = round(sum(latencies) / len(latencies), 3)
+    for field in ("expanded", "peak_frontier", "peak_bytes"):
+        if field not in results[0]:
+            continue
+        values = [r[field] for r in results]
+        summary[field] = {
+            "mean": round(sum(values) / len(values), 1),
+            "p50": percentile(values, 50),
+            "max": max(values),
+        }
+    if "peak_bytes" in results[0]:
+        expanded = sum(r["expanded"] for r in results)
+        peak = sum(r["peak_bytes"] for r in results)
+        summary["bytes_per_expanded"] = round(peak / max(expanded, 1), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python benchmark.py [directory] [-n N]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-n", type=int, default=100, help="number of random pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact", action="store_true",
+                        help="load into a compact integer-indexed graph (ids must be numeric)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a cached binary snapshot")
+    parser.add_argument("--methods",
+                        help="comma-separated search strategies (default: all available)")
+    parser.add_argument("--memory", action="store_true",
+                        help="also trace peak allocations per query (slows every query)")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    try:
+        degrees.load_data(args.directory, compact=args.compact, snapshot=args.snapshot)
+    except ValueError as e:
+        sys.exit(str(e))
+    load_seconds = time.perf_counter() - start_time
+    methods = args.methods.split(",") if args.methods else degrees.available_methods()
+    for method in methods:
+        if method not in degrees.METHODS:
+            sys.exit(f"unknown method: {method}")
+        if method not in degrees.available_methods():
+            sys.exit(f"method {method} needs the compact graph (--compact or --snapshot)")
+
+    pairs = connected_pairs(people_ids(), args.n, args.seed)
+    if not pairs:
+        sys.exit("No connected pairs of people.")
+
+    results = {}
+    for method in methods:
+        # Build any index or worker pool before timing
+        degrees.shortest_path(*pairs[0], method=method)
+        if args.memory:
+            tracemalloc.start()
+        results[method] = [
+            run_query(source, target, method, args.memory) for source, target in pairs
+        ]
+        if args.memory:
+            tracemalloc.stop()
+
+    # Every method must agree on the degrees of separation
+    mismatches = sum(
+        len({results[method][i]["degrees"] for method in methods}) > 1
+        for i in range(len(pairs))
+    )
+    report = {
+        "directory": args.directory,
+        "mode": "snapshot" if args.snapshot else "compact" if args.compact else "dicts",
+        "pairs": len(pairs),
+        "seed": args.seed,
+        "load_seconds": round(load_seconds, 3),
+        "mean_degrees": round(sum(r["degrees"] for r in results[methods[0]]) / len(pairs), 2),
+        "mismatches": mismatches,
+        "methods": {method: summarize(results[method]) for method in methods},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['pairs']} connected pairs from {args.directory} ({report['mode']}), "
+          f"seed {args.seed}, mean {report['mean_degrees']} degrees, "
+          f"loaded in {report['load_seconds']} seconds")
+    header = (f"{'method':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'expanded':>12}{'frontier':>12}")
+    if args.memory:
+        header += f"{'peak KB':>12}{'B/expanded':>12}"
+    print(header)
+    for method, summary in report["methods"].items():
+        latency = summary["latency_ms"]
+        line = (f"{method:<14}{latency['p50']:>10.3f}{latency['p95']:>10.3f}"
+                f"{latency['p99']:>10.3f}{summary['expanded']['mean']:>12.1f}"
+                f"{summary['peak_frontier']['mean']:>12.1f}")
+        if args.memory:
+            line += (f"{summary['peak_bytes']['mean'] / 1024:>12.1f}"
+                     f"{summary['bytes_per_expanded']:>12.1f}")
+        print(line)
+    if mismatches:
+        print(f"{mismatches} pairs where the methods disagree on the degrees")
+
+
+if __name__ == "__main__":
+    main()
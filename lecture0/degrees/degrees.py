@@ -1,8 +1,18 @@
+import argparse
 import csv
+import os
 import sys
 import time
 
-from util import Node, StackFrontier, QueueFrontier
+import ingest
+from graph import load_graph, record_stats
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from parallel import ParallelBFS
+from paths import PathDAG, k_shortest_paths
+from snapshot import append_sources, load_cached_graph, update_snapshot
+from trees import TreeCache
+from util import Node, StackFrontier, QueueFrontier, reverse_path
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,54 +23,317 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of people and movies when loaded
+graph = None
 
-def load_data(directory):
+# BFS trees of recently queried people in the compact graph
+tree_cache = TreeCache()
+
+# Landmark distance oracle over the compact graph, built on first use
+landmarks = None
+
+# Prefix and fuzzy index over names, built on the first failed lookup
+name_index = None
+
+# Directory whose snapshot backs the compact graph, kept current by ingest
+snapshot_directory = None
+
+# Number of landmarks picked when the oracle is built
+LANDMARKS = 16
+
+# Worker pool and shared adjacency for the parallel method, started on first use
+parallel_bfs = None
+
+# Number of worker processes for the parallel method
+PARALLEL_WORKERS = os.cpu_count() or 1
+
+# Search strategies accepted by shortest_path
+METHODS = ("bfs", "bidirectional", "landmarks", "parallel")
+
+# Search strategies that only run on the compact graph
+COMPACT_METHODS = ("landmarks", "parallel")
+
+
+def load_data(directory, compact=False, snapshot=False, workers=None):
     """
     Load data from CSV files into memory.
+
+    If compact is set, the data is loaded into an integer-indexed Graph
+    instead of the names, people and movies dicts. The Graph stores ids
+    as integers, so every id must be numeric without leading zeros, or
+    loading raises ValueError naming the row. If snapshot is set,
+    the Graph is memory-mapped from a binary snapshot of the directory,
+    which is rebuilt whenever the CSV files change. If workers is set,
+    the CSV files are parsed in chunks by that many processes.
     """
+    global graph, landmarks, name_index, snapshot_directory
+    tree_cache.clear()
+    landmarks = None
+    name_index = None
+    snapshot_directory = None
+    set_parallel_workers(PARALLEL_WORKERS)
+    if snapshot:
+        graph = load_cached_graph(directory, workers=workers)
+        snapshot_directory = directory
+        return
+    if compact:
+        graph = load_graph(directory, workers=workers)
+        return
+    graph = None
+
+    if workers:
+        for row in ingest.people_rows(directory, workers):
+            add_person(*row)
+        for row in ingest.movie_rows(directory, workers):
+            add_movie(*row)
+        for row in ingest.star_rows(directory, workers):
+            add_star(*row)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+            add_person(row["id"], row["name"], row["birth"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+            add_movie(row["id"], row["title"], row["year"])
 
     # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            add_star(row["person_id"], row["movie_id"])
+
+
+def available_methods():
+    """
+    Returns the search strategies the loaded data supports.
+    """
+    if graph is not None:
+        return list(METHODS)
+    return [method for method in METHODS if method not in COMPACT_METHODS]
+
+
+def add_person(person_id, name, birth):
+    people[person_id] = {
+        "name": name,
+        "birth": birth,
+        "movies": set()
+    }
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+    else:
+        names[name.lower()].add(person_id)
+
+
+def add_movie(movie_id, title, year):
+    movies[movie_id] = {
+        "title": title,
+        "year": year,
+        "stars": set()
+    }
+
+
+def add_star(person_id, movie_id):
+    try:
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+    except KeyError:
+        pass
+
+
+def ingest_rows(person_rows=(), movie_rows=(), star_rows=()):
+    """
+    Applies delta rows to the loaded data without reloading it:
+    (id, name, birth) people, (id, title, year) movies and
+    (person_id, movie_id) stars. Ids already loaded and stars naming
+    unknown ids are skipped.
+
+    Only the BFS trees and landmark distances the new stars change are
+    rebuilt. If the compact graph came from a snapshot, the rows are
+    appended to its CSV files and the snapshot is rewritten.
+
+    Every row is checked before any is applied, so a bad row raises
+    ValueError and leaves the data, CSV files and snapshot unchanged.
+
+    Returns the list of new (person_id, movie_id) stars.
+    """
+    global name_index
+    person_rows = _check_rows(person_rows, 3, 1, "people")
+    movie_rows = _check_rows(movie_rows, 3, 1, "movies")
+    star_rows = _check_rows(star_rows, 2, 2, "stars")
+    if graph is None:
+        known = len(people)
+        stars = _ingest_dicts(person_rows, movie_rows, star_rows)
+        if len(people) > known:
+            name_index = None
+        return stars
+
+    graph.make_mutable()
+    first_person = graph.num_people()
+    first_movie = graph.num_movies()
+    new_people = []
+    for person_id, name, birth in person_rows:
+        if graph.person_index(person_id) is None:
+            graph.add_person(person_id, name, birth)
+            graph.index_new(graph.num_people() - 1, graph.num_movies())
+            new_people.append((person_id, name, birth))
+    new_movies = []
+    for movie_id, title, year in movie_rows:
+        if graph.movie_index(movie_id) is None:
+            graph.add_movie(movie_id, title, year)
+            graph.index_new(graph.num_people(), graph.num_movies() - 1)
+            new_movies.append((movie_id, title, year))
+
+    star_people = []
+    star_movies = []
+    for person_id, movie_id in star_rows:
+        p = graph.person_index(person_id)
+        m = graph.movie_index(movie_id)
+        if p is not None and m is not None:
+            star_people.append(p)
+            star_movies.append(m)
+    edges = graph.add_edges(star_people, star_movies)
+
+    if graph.num_people() > first_person:
+        name_index = None
+    if edges or graph.num_people() > first_person or graph.num_movies() > first_movie:
+        tree_cache.update(graph, edges)
+        if landmarks is not None:
+            landmarks.update(edges)
+        set_parallel_workers(PARALLEL_WORKERS)
+    stars = [(graph.person_id(p), graph.movie_id(m)) for p, m in edges]
+
+    if snapshot_directory is not None and (new_people or new_movies or stars):
+        append_sources(snapshot_directory, new_people, new_movies, stars)
+        update_snapshot(graph, snapshot_directory)
+    return stars
+
+
+def ingest_directory(directory):
+    """
+    Applies the rows of whichever of people.csv, movies.csv and
+    stars.csv exist in a delta directory. See ingest_rows.
+    Raises ValueError if the directory does not exist.
+    """
+    if not os.path.isdir(directory):
+        raise ValueError(f"no such ingest directory: {directory}")
+
+    def rows(name, fields):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            missing = set(fields) - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"{path} has no {', '.join(sorted(missing))} column")
+            return [tuple(row[field] for field in fields) for row in reader]
+
+    return ingest_rows(
+        rows("people.csv", ("id", "name", "birth")),
+        rows("movies.csv", ("id", "title", "year")),
+        rows("stars.csv", ("person_id", "movie_id")),
+    )
+
+
+def _check_rows(rows, width, ids, kind):
+    """
+    Returns rows as tuples of strings, raising ValueError for a row
+    without width fields or, for the compact graph, whose first ids
+    fields hold an id it cannot store.
+    """
+    checked = []
+    for row in rows:
+        row = tuple(row)
+        if len(row) != width or None in row:
+            raise ValueError(f"{kind} row {list(row)} does not have {width} fields")
+        row = tuple(str(field) for field in row)
+        if graph is not None:
+            for field in row[:ids]:
+                ingest.parse_id(field, f"{kind} rows", row)
+        checked.append(row)
+    return checked
+
+
+def _ingest_dicts(person_rows, movie_rows, star_rows):
+    for person_id, name, birth in person_rows:
+        if person_id not in people:
+            add_person(person_id, name, birth)
+    for movie_id, title, year in movie_rows:
+        if movie_id not in movies:
+            add_movie(movie_id, title, year)
+    stars = []
+    for person_id, movie_id in star_rows:
+        if person_id in people and movie_id in movies:
+            if movie_id not in people[person_id]["movies"]:
+                add_star(person_id, movie_id)
+                stars.append((person_id, movie_id))
+    return stars
+
+
+def distances_from_any(person_ids, limit=None):
+    """
+    Returns a dict mapping every person within limit degrees of any of
+    person_ids (or every reachable person if limit is None) to their
+    degrees of separation from the nearest one.
+    """
+    dist = {person_id: 0 for person_id in person_ids}
+    frontier = list(dist)
+    depth = 0
+    while frontier and (limit is None or depth < limit):
+        depth += 1
+        next_frontier = []
+        for person_id in frontier:
+            for _, neighbor in iter_neighbors(person_id, dist):
+                dist[neighbor] = depth
+                next_frontier.append(neighbor)
+        frontier = next_frontier
+    return dist
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(usage="python degrees.py [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load into a compact integer-indexed graph (ids must be numeric)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a cached binary snapshot")
+    parser.add_argument("--workers", type=int,
+                        help="parse the CSV files with this many processes")
+    parser.add_argument("--method", choices=METHODS, default="bfs",
+                        help="search strategy for shortest_path")
+    parser.add_argument("--landmarks", type=int, default=LANDMARKS,
+                        help="number of landmarks for the landmarks method")
+    parser.add_argument("--search-workers", type=int, default=PARALLEL_WORKERS,
+                        help="number of processes for the parallel method")
+    parser.add_argument("--paths", type=int, default=1,
+                        help="print up to this many paths, shortest first (compact graph)")
+    parser.add_argument("--all", action="store_true",
+                        help="print every shortest path, up to --paths if given")
+    parser.add_argument("--count", action="store_true",
+                        help="only print how many shortest paths there are")
+    args = parser.parse_args()
+    if args.method in COMPACT_METHODS and not (args.compact or args.snapshot):
+        parser.error(f"--method {args.method} needs --compact or --snapshot")
+    if args.paths < 1:
+        parser.error("--paths must be at least 1")
+    if (args.count or args.all or args.paths > 1) and not (args.compact or args.snapshot):
+        parser.error("--count, --all and --paths need --compact or --snapshot")
+    set_landmarks(args.landmarks)
+    set_parallel_workers(args.search_workers)
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    try:
+        load_data(args.directory, compact=args.compact, snapshot=args.snapshot,
+                  workers=args.workers)
+    except ValueError as e:
+        sys.exit(str(e))
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -71,8 +344,21 @@ def main():
         sys.exit("Person not found.")
 
     start_time = time.time()
-    path = shortest_path(source, target)
+    if args.count:
+        print(f"{count_shortest_paths(source, target)} shortest paths.")
+    elif args.all:
+        limit = args.paths if args.paths > 1 else None
+        for path in all_shortest_paths(source, target, limit):
+            print_path(source, path)
+    elif args.paths > 1:
+        for path in k_best_paths(source, target, args.paths):
+            print_path(source, path)
+    else:
+        print_path(source, shortest_path(source, target, method=args.method))
+    print("--- %s seconds ---" % (time.time() - start_time))
+
 
+def print_path(source, path):
     if path is None:
         print("Not connected.")
     else:
@@ -80,52 +366,279 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
-    print("--- %s seconds ---" % (time.time() - start_time))
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, method="bfs", stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    method is one of METHODS: "bfs" searches outward from the source,
+    "bidirectional" searches from both ends and meets in the middle,
+    "landmarks" runs A* guided by the landmark oracle and "parallel" expands
+    each BFS level in worker processes (both compact graph only).
+
+    If stats is a dict, the number of people expanded and the peak
+    frontier size are stored in it. A path served from a cached BFS tree
+    expands no one.
+
     If no possible path, returns None.
     """
+    if method not in METHODS:
+        raise ValueError(f"unknown method: {method}")
+
+    if graph is not None:
+        s = graph.person_index(source)
+        t = graph.person_index(target)
+        source_tree = tree_cache.peek(s)
+        target_tree = tree_cache.peek(t) if source_tree is None else None
+        if source_tree is not None or target_tree is not None:
+            record_stats(stats, 0, 0)
+        if source_tree is not None:
+            path = source_tree.path_to(t)
+        elif target_tree is not None:
+            path = target_tree.path_to(s)
+            if path is not None:
+                path = reverse_path(t, path)
+        elif method == "bidirectional":
+            path = graph.bidirectional_path(s, t, stats=stats)
+        elif method == "landmarks":
+            path = landmark_index().shortest_path(s, t, stats=stats)
+        elif method == "parallel":
+            path = parallel_search().shortest_path(s, t, stats=stats)
+        else:
+            path = graph.shortest_path(s, t, stats=stats)
+        if path is None:
+            return None
+        return [(graph.movie_id(m), graph.person_id(p)) for m, p in path]
+
+    if source == target:
+        record_stats(stats, 0, 0)
+        return []
+    if method == "bidirectional":
+        return bidirectional_path(source, target, stats=stats)
+    if method in ("landmarks", "parallel"):
+        raise ValueError(f"the {method} method needs the compact graph")
 
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
 
-    explored = set()
+    # People already added to the frontier, so each is generated only once
+    reached = {source}
+
+    while not frontier.empty():
+        node = frontier.remove()
 
-    while True:
+        for movie, person in iter_neighbors(node.state, reached):
+            reached.add(person)
+            child = Node(state=person, parent=node, action=movie)
+            if person == target:
+                path = []
+                node = child
 
-        if frontier.empty():
-            return None
+                while node.parent is not None:
+                    path.append((node.action, node.state))
+                    node = node.parent
 
-        node = frontier.remove()
+                path.reverse()
+
+                record_stats(stats, frontier.pops, frontier.peak_size)
+                return path
+
+            frontier.add(child)
+
+    record_stats(stats, frontier.pops, frontier.peak_size)
+    return None
+
+
+def bidirectional_path(source, target, stats=None):
+    """
+    Bidirectional breadth-first search over the people and movies dicts,
+    expanding the smaller frontier one full level at a time.
+    """
+
+    # Maps person_id to (movie_id, next person_id towards that side's start)
+    parents = ({source: None}, {target: None})
+    dists = ({source: 0}, {target: 0})
+    frontiers = [[source], [target]]
+    expanded = 0
+    peak_frontier = 2
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        expanded += len(frontiers[side])
+        parent = parents[side]
+        dist = dists[side]
+        other_dist = dists[1 - side]
+
+        # Finish the whole level so the best meeting point is kept
+        meet = None
+        next_frontier = []
+        level = frontiers[side]
+        other = len(frontiers[1 - side])
+        for i, person_id in enumerate(level):
+            d = dist[person_id] + 1
+            for movie_id, neighbor in iter_neighbors(person_id, dist):
+                dist[neighbor] = d
+                parent[neighbor] = (movie_id, person_id)
+                if neighbor in other_dist and (
+                    meet is None
+                    or d + other_dist[neighbor] < dist[meet] + other_dist[meet]
+                ):
+                    meet = neighbor
+                next_frontier.append(neighbor)
+            peak_frontier = max(peak_frontier, len(level) - i - 1 + len(next_frontier) + other)
+
+        if meet is not None:
+            path = []
+            node = meet
+            while parents[0][node] is not None:
+                movie_id, previous = parents[0][node]
+                path.append((movie_id, node))
+                node = previous
+            path.reverse()
+            node = meet
+            while parents[1][node] is not None:
+                movie_id, node = parents[1][node]
+                path.append((movie_id, node))
+            record_stats(stats, expanded, peak_frontier)
+            return path
+        frontiers[side] = next_frontier
+    record_stats(stats, expanded, peak_frontier)
+    return None
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Lazily yields up to limit shortest lists of (movie_id, person_id)
+    pairs that connect the source to the target, over the compact graph.
+    """
+    dag = _path_dag(source, target)
+    for path in dag.paths(limit):
+        yield [(graph.movie_id(m), graph.person_id(p)) for m, p in path]
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many shortest paths connect the source to the target,
+    without listing them.
+    """
+    return _path_dag(source, target).count()
+
+
+def k_best_paths(source, target, k):
+    """
+    Lazily yields up to k loopless paths that connect the source to the
+    target, shortest first, over the compact graph.
+    """
+    if graph is None:
+        raise ValueError("multiple paths need the compact graph")
+    s = graph.person_index(source)
+    t = graph.person_index(target)
+    for path in k_shortest_paths(graph, s, t, k):
+        yield [(graph.movie_id(m), graph.person_id(p)) for m, p in path]
+
+
+def _path_dag(source, target):
+    if graph is None:
+        raise ValueError("multiple paths need the compact graph")
+    return PathDAG(graph, graph.person_index(source), graph.person_index(target))
+
+
+def landmark_index():
+    """
+    Returns the landmark oracle for the compact graph, building it on first use.
+    """
+    global landmarks
+    if graph is None:
+        raise ValueError("landmarks need the compact graph")
+    if landmarks is None:
+        landmarks = LandmarkIndex.build(graph, k=LANDMARKS)
+    return landmarks
 
-        explored.add(node.state)
 
-        for movie, person in neighbors_for_person(node.state):
-            if not frontier.contains_state(person) and person not in explored:
-                child = Node(state=person, parent=node, action=movie)
-                if child == target:
-                    path = []
+def set_landmarks(k):
+    """
+    Sets the number of landmarks, dropping an oracle built with another count.
+    """
+    global LANDMARKS, landmarks
+    if k != LANDMARKS:
+        LANDMARKS = k
+        landmarks = None
+
+
+def parallel_search():
+    """
+    Returns the parallel BFS for the compact graph, starting its workers
+    on first use.
+    """
+    global parallel_bfs
+    if graph is None:
+        raise ValueError("parallel search needs the compact graph")
+    if parallel_bfs is None:
+        parallel_bfs = ParallelBFS(graph, PARALLEL_WORKERS)
+    return parallel_bfs
 
-                    while node.parent is not None:
-                        path.append((node.action, node.state))
-                        node = node.parent
 
-                    path.reverse()
+def set_parallel_workers(k):
+    """
+    Sets the number of workers for the parallel method, stopping any
+    workers already started.
+    """
+    global PARALLEL_WORKERS, parallel_bfs
+    PARALLEL_WORKERS = k
+    if parallel_bfs is not None:
+        parallel_bfs.close()
+        parallel_bfs = None
 
-                    return path
-                else:
 
-                    frontier.add(child)
+def separation_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation of two
+    person ids from the landmark oracle. lower is None if they are not
+    connected, upper is None if unknown.
+    """
+    return landmark_index().bounds(graph.person_index(source), graph.person_index(target))
+
+
+def bfs_tree(source):
+    """
+    Returns the BFSTree from a person id over the compact graph,
+    holding the parent, movie and distance of every reachable person.
+    Trees are kept in tree_cache.
+    """
+    if graph is None:
+        raise ValueError("BFS trees need the compact graph")
+    return tree_cache.get(graph, graph.person_index(source))
+
+
+def degrees_from(source, targets):
+    """
+    Returns a dict mapping each target person id to its degrees of
+    separation from the source, or None if not connected,
+    using a single breadth-first search.
+    """
+    tree = bfs_tree(source)
+    return {
+        target: tree.distance(graph.person_index(target))
+        for target in targets
+    }
+
+
+def path_from_tree(tree, target):
+    """
+    Returns the (movie_id, person_id) path from a BFS tree's source
+    to a target person id, or None if not connected.
+    """
+    path = tree.path_to(graph.person_index(target))
+    if path is None:
+        return None
+    return [(graph.movie_id(m), graph.person_id(p)) for m, p in path]
 
 
 def person_id_for_name(name):
@@ -133,32 +646,130 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
-        return None
+        person_ids = name_candidates(name)
+        if len(person_ids) == 0:
+            return None
+        return choose_person(f"No one named '{name}'. Did you mean:", person_ids)
     elif len(person_ids) > 1:
-        print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
+        return choose_person(f"Which '{name}'?", person_ids)
     else:
         return person_ids[0]
 
 
+def choose_person(heading, person_ids):
+    """
+    Lists people under a heading and returns the id the user picks
+    from them, or None.
+    """
+    print(heading)
+    for person_id in person_ids:
+        person = person_record(person_id)
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def name_candidates(name, limit=10):
+    """
+    Returns the person ids of up to limit names that start with or
+    closely resemble name, best matches first.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex.build(sorted_names())
+    person_ids = []
+    for candidate in name_index.search(name, limit):
+        person_ids.extend(person_ids_for_name(candidate))
+    return person_ids
+
+
+def sorted_names():
+    """
+    Yields every distinct lowercase name in sorted order.
+    """
+    if graph is None:
+        yield from sorted(names)
+        return
+    previous = None
+    for p in graph.name_order:
+        name = graph.person_name(p).lower()
+        if name != previous:
+            yield name
+            previous = name
+
+
+def person_ids_for_name(name):
+    """
+    Returns a list of IMDB ids for people with the given name.
+    """
+    if graph is not None:
+        return [graph.person_id(p) for p in graph.indexes_for_name(name)]
+    return list(names.get(name.lower(), set()))
+
+
+def person_record(person_id):
+    """
+    Returns a dictionary with the name and birth of a person.
+    """
+    if graph is not None:
+        p = graph.person_index(person_id)
+        return {"name": graph.person_name(p), "birth": graph.person_birth(p)}
+    return people[person_id]
+
+
+def movie_record(movie_id):
+    """
+    Returns a dictionary with the title and year of a movie.
+    """
+    if graph is not None:
+        m = graph.movie_index(movie_id)
+        return {"title": graph.movie_title(m), "year": graph.movie_year(m)}
+    return movies[movie_id]
+
+
+def iter_neighbors(person_id, reached=()):
+    """
+    Lazily yields (movie_id, person_id) pairs for people who starred
+    with a given person, skipping people in reached.
+
+    reached is checked as each pair is produced, so a caller that adds
+    every yielded person to it sees each person at most once, and can
+    stop as soon as it sees the one it is looking for.
+    """
+    if graph is not None:
+        for m, q in graph.neighbors(graph.person_index(person_id)):
+            neighbor = graph.person_id(q)
+            if neighbor not in reached:
+                yield graph.movie_id(m), neighbor
+        return
+
+    for movie_id in people[person_id]["movies"]:
+        for neighbor in movies[movie_id]["stars"]:
+            if neighbor not in reached:
+                yield movie_id, neighbor
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        p = graph.person_index(person_id)
+        return {
+            (graph.movie_id(m), graph.person_id(q))
+            for m, q in graph.neighbors(p)
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
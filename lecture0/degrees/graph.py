@@ -0,0 +1,563 @@
+import csv
+from array import array
+from bisect import bisect_left, bisect_right
+
+import ingest
+
+
+class StringTable():
+    """
+    Append-only list of strings packed into a single UTF-8 buffer.
+
+    data and offsets may also be read-only memoryviews of a snapshot.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def append(self, s):
+        self.data += s.encode("utf-8")
+        self.offsets.append(len(self.data))
+
+
+# Graph arrays that snapshots may back with read-only memoryviews
+MUTABLE_ARRAYS = (
+    "person_ids", "person_births", "movie_ids", "movie_years",
+    "person_order", "movie_order", "name_order",
+    "person_offsets", "person_movies", "movie_offsets", "movie_people",
+)
+
+
+class Graph():
+    """
+    Compact co-star graph.
+
+    People and movies are interned to dense integer indexes, and the
+    person -> movie and movie -> person adjacency is stored in CSR form:
+    the movies of person p are
+    person_movies[person_offsets[p]:person_offsets[p + 1]].
+
+    IMDB ids are numeric, so they are kept as integers and looked up by
+    binary search over an index permutation sorted by id. Loading rejects
+    any other id, including zero-padded ones, which would not read back
+    unchanged.
+    """
+
+    def __init__(self):
+
+        # Per-index attributes, with 0 for an unknown year
+        self.person_ids = array("q")
+        self.person_names = StringTable()
+        self.person_births = array("H")
+        self.movie_ids = array("q")
+        self.movie_titles = StringTable()
+        self.movie_years = array("H")
+
+        # Index permutations sorted by id, and people sorted by lowercase name
+        self.person_order = array("i")
+        self.movie_order = array("i")
+        self.name_order = array("i")
+
+        # CSR adjacency
+        self.person_offsets = array("q", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("q", [0])
+        self.movie_people = array("i")
+
+    def num_people(self):
+        return len(self.person_ids)
+
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person and returns their index.
+        """
+        self.person_ids.append(int(person_id))
+        self.person_names.append(name)
+        self.person_births.append(_year(birth))
+        return len(self.person_ids) - 1
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie and returns its index.
+        """
+        self.movie_ids.append(int(movie_id))
+        self.movie_titles.append(title)
+        self.movie_years.append(_year(year))
+        return len(self.movie_ids) - 1
+
+    def person_id(self, p):
+        return str(self.person_ids[p])
+
+    def movie_id(self, m):
+        return str(self.movie_ids[m])
+
+    def person_name(self, p):
+        return self.person_names[p]
+
+    def person_birth(self, p):
+        birth = self.person_births[p]
+        return str(birth) if birth else ""
+
+    def movie_title(self, m):
+        return self.movie_titles[m]
+
+    def movie_year(self, m):
+        year = self.movie_years[m]
+        return str(year) if year else ""
+
+    def person_index(self, person_id):
+        """
+        Returns the index of a person, or None if unknown.
+        """
+        return _lookup(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of a movie, or None if unknown.
+        """
+        return _lookup(self.movie_order, self.movie_ids, movie_id)
+
+    def indexes_for_name(self, name):
+        """
+        Returns a tuple of person indexes with the given name.
+        """
+        key = name.lower()
+        order = self.name_order
+        names = self.person_names
+        i = bisect_left(_Keys(order, lambda p: names[p].lower()), key)
+        found = []
+        while i < len(order) and names[order[i]].lower() == key:
+            found.append(order[i])
+            i += 1
+        return tuple(found)
+
+    def build(self, star_people, star_movies):
+        """
+        Builds the lookup orders and the CSR adjacency from parallel
+        arrays of (person index, movie index) edges.
+        Duplicate edges are dropped.
+        """
+        self.reindex()
+        self.person_offsets, self.person_movies = _csr(
+            self.num_people(), star_people, star_movies
+        )
+        self.movie_offsets, self.movie_people = _transpose(
+            self.num_movies(), self.person_offsets, self.person_movies
+        )
+
+    def reindex(self):
+        """
+        Rebuilds the sorted lookup orders after people or movies are added.
+        """
+        names = self.person_names
+        self.person_order = _argsort(self.person_ids)
+        self.movie_order = _argsort(self.movie_ids)
+        self.name_order = array("i", sorted(
+            range(self.num_people()), key=lambda p: names[p].lower()
+        ))
+
+    def make_mutable(self):
+        """
+        Copies any arrays still backed by a read-only snapshot into memory,
+        so people, movies and edges can be added.
+        """
+        for name in MUTABLE_ARRAYS:
+            value = getattr(self, name)
+            if isinstance(value, memoryview):
+                setattr(self, name, _copy(value))
+        for table in (self.person_names, self.movie_titles):
+            if isinstance(table.data, memoryview):
+                table.data = bytearray(table.data)
+                table.offsets = _copy(table.offsets)
+
+    def index_new(self, first_person, first_movie):
+        """
+        Inserts people and movies added from the given indexes on into
+        the sorted lookup orders, without a full reindex.
+        """
+        names = self.person_names
+        for p in range(first_person, self.num_people()):
+            _insert(self.person_order, p, self.person_ids.__getitem__)
+            _insert(self.name_order, p, lambda i: names[i].lower())
+        for m in range(first_movie, self.num_movies()):
+            _insert(self.movie_order, m, self.movie_ids.__getitem__)
+
+    def add_edges(self, star_people, star_movies):
+        """
+        Merges (person index, movie index) edges into the CSR adjacency,
+        touching only the rows that gain an edge.
+
+        Returns the list of edges that were not already present.
+        """
+        person_additions = {}
+        movie_additions = {}
+        added = []
+        for p, m in zip(star_people, star_movies):
+            if m in person_additions.get(p, ()):
+                continue
+            if p < len(self.person_offsets) - 1 and m in self.movies_for_person(p):
+                continue
+            person_additions.setdefault(p, set()).add(m)
+            movie_additions.setdefault(m, set()).add(p)
+            added.append((p, m))
+
+        self.person_offsets, self.person_movies = _merge_csr(
+            self.person_offsets, self.person_movies, self.num_people(), person_additions
+        )
+        self.movie_offsets, self.movie_people = _merge_csr(
+            self.movie_offsets, self.movie_people, self.num_movies(), movie_additions
+        )
+        return added
+
+    def movies_for_person(self, p):
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def people_for_movie(self, m):
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with person p.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for k in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[k]
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                yield m, movie_people[j]
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Breadth-first search between two person indexes.
+
+        If stats is a dict, the number of people expanded and the peak
+        frontier size are stored in it.
+
+        Returns a list of (movie index, person index) pairs, or None.
+        """
+        if source == target:
+            record_stats(stats, 0, 0)
+            return []
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+
+        parent = array("i", [-1]) * self.num_people()
+        via = array("i", [-1]) * self.num_people()
+        seen_movie = bytearray(self.num_movies())
+        parent[source] = source
+
+        # The live frontier is what is left of the current level plus the
+        # next level found so far, as in a FIFO queue
+        frontier = [source]
+        expanded = 0
+        peak_frontier = 1
+        while frontier:
+            next_frontier = []
+            for i, p in enumerate(frontier):
+                expanded += 1
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+
+                    # Every co-star of a movie is reached the first time
+                    # the movie is expanded, so never expand it twice
+                    if seen_movie[m]:
+                        continue
+                    seen_movie[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if parent[q] != -1:
+                            continue
+                        parent[q] = p
+                        via[q] = m
+                        if q == target:
+                            live = len(frontier) - i - 1 + len(next_frontier)
+                            record_stats(stats, expanded, max(peak_frontier, live))
+                            return trace_path(parent, via, source, target)
+                        next_frontier.append(q)
+                peak_frontier = max(peak_frontier, len(frontier) - i - 1 + len(next_frontier))
+            frontier = next_frontier
+        record_stats(stats, expanded, peak_frontier)
+        return None
+
+    def bidirectional_path(self, source, target, stats=None):
+        """
+        Bidirectional breadth-first search between two person indexes,
+        expanding the smaller frontier one full level at a time until
+        the two searches meet.
+
+        Returns a list of (movie index, person index) pairs, or None.
+        """
+        if source == target:
+            record_stats(stats, 0, 0)
+            return []
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        n = self.num_people()
+
+        # Index 0 searches forward from the source, 1 backward from the target
+        parents = (array("i", [-1]) * n, array("i", [-1]) * n)
+        vias = (array("i", [-1]) * n, array("i", [-1]) * n)
+        dists = (array("i", [-1]) * n, array("i", [-1]) * n)
+        seen_movies = (bytearray(self.num_movies()), bytearray(self.num_movies()))
+        frontiers = [[source], [target]]
+        for side, start in enumerate((source, target)):
+            parents[side][start] = start
+            dists[side][start] = 0
+        expanded = 0
+        peak_frontier = 2
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            expanded += len(frontiers[side])
+            parent = parents[side]
+            via = vias[side]
+            dist = dists[side]
+            seen_movie = seen_movies[side]
+            other_dist = dists[1 - side]
+
+            # Finish the whole level so the best meeting point is kept
+            best = -1
+            meet = -1
+            next_frontier = []
+            level = frontiers[side]
+            other = len(frontiers[1 - side])
+            for i, p in enumerate(level):
+                d = dist[p] + 1
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if seen_movie[m]:
+                        continue
+                    seen_movie[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if dist[q] != -1:
+                            continue
+                        dist[q] = d
+                        parent[q] = p
+                        via[q] = m
+                        if other_dist[q] != -1 and (best == -1 or d + other_dist[q] < best):
+                            best = d + other_dist[q]
+                            meet = q
+                        next_frontier.append(q)
+                live = len(level) - i - 1 + len(next_frontier) + other
+                peak_frontier = max(peak_frontier, live)
+
+            if meet != -1:
+                path = trace_path(parents[0], vias[0], source, meet)
+                node = meet
+                while node != target:
+                    path.append((vias[1][node], parents[1][node]))
+                    node = parents[1][node]
+                record_stats(stats, expanded, peak_frontier)
+                return path
+            frontiers[side] = next_frontier
+        record_stats(stats, expanded, peak_frontier)
+        return None
+
+
+def record_stats(stats, expanded, peak_frontier):
+    if stats is not None:
+        stats["expanded"] = expanded
+        stats["peak_frontier"] = peak_frontier
+
+
+def _copy(values):
+    copied = array(values.format if isinstance(values, memoryview) else values.typecode)
+    copied.frombytes(memoryview(values).cast("B"))
+    return copied
+
+
+class _Keys():
+    """
+    Read-only view of key(i) for each i in order, so bisect can search
+    an index permutation without the key argument of Python 3.10.
+    """
+
+    def __init__(self, order, key):
+        self.order = order
+        self.key = key
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.key(self.order[i])
+
+
+def _insert(order, index, key):
+    order.insert(bisect_right(_Keys(order, key), key(index)), index)
+
+
+def _merge_csr(offsets, values, rows, additions):
+    """
+    Returns CSR offsets and values for rows rows, with the columns in
+    additions (a dict of row -> set of columns) merged into their rows.
+    Unchanged runs of rows are copied in bulk.
+    """
+    old_rows = len(offsets) - 1
+    new_offsets = array("q", [0])
+    new_values = array("i")
+    start = 0
+    for r in sorted(additions) + [rows]:
+        end = min(r, old_rows)
+        if start < end:
+            shift = len(new_values) - offsets[start]
+            new_values.extend(values[offsets[start]:offsets[end]])
+            new_offsets.extend(o + shift for o in offsets[start + 1:end + 1])
+        for _ in range(max(start, old_rows), r):
+            new_offsets.append(len(new_values))
+        if r == rows:
+            break
+        row = set(additions[r])
+        if r < old_rows:
+            row.update(values[offsets[r]:offsets[r + 1]])
+        new_values.extend(sorted(row))
+        new_offsets.append(len(new_values))
+        start = r + 1
+    return new_offsets, new_values
+
+
+def _year(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def _argsort(values):
+    return array("i", sorted(range(len(values)), key=values.__getitem__))
+
+
+def _lookup(order, ids, key):
+    key = str(key)
+    if not ingest.is_numeric_id(key):
+        return None
+    key = int(key)
+    i = bisect_left(_Keys(order, ids.__getitem__), key)
+    if i < len(order) and ids[order[i]] == key:
+        return order[i]
+    return None
+
+
+def _csr(rows, row_of, col_of):
+    """
+    Counting sort of (row, col) edges into CSR offsets and columns,
+    with each row sorted and deduplicated.
+    """
+    counts = array("q", [0]) * (rows + 1)
+    for r in row_of:
+        counts[r + 1] += 1
+    for r in range(rows):
+        counts[r + 1] += counts[r]
+
+    cols = array("i", [0]) * len(row_of)
+    fill = array("q", counts)
+    for r, c in zip(row_of, col_of):
+        cols[fill[r]] = c
+        fill[r] += 1
+
+    offsets = array("q", [0]) * (rows + 1)
+    out = array("i")
+    for r in range(rows):
+        out.extend(sorted(set(cols[counts[r]:counts[r + 1]])))
+        offsets[r + 1] = len(out)
+    return offsets, out
+
+
+def _transpose(cols, offsets, values):
+    """
+    Transposes a CSR matrix with the given number of columns.
+    """
+    rows_of = array("i", [0]) * len(values)
+    for r in range(len(offsets) - 1):
+        for k in range(offsets[r], offsets[r + 1]):
+            rows_of[k] = r
+    return _csr(cols, values, rows_of)
+
+
+def trace_path(parent, via, source, target):
+    path = []
+    node = target
+    while node != source:
+        path.append((via[node], node))
+        node = parent[node]
+    path.reverse()
+    return path
+
+
+def load_graph(directory, workers=None):
+    """
+    Load data from CSV files into a compact Graph.
+
+    If workers is set, the CSV files are parsed in chunks by that many processes.
+    """
+    graph = Graph()
+    if workers:
+        person_rows = ingest.people_rows(directory, workers)
+        movie_rows = ingest.movie_rows(directory, workers)
+        star_chunks = ingest.star_chunks(directory, workers)
+    else:
+        person_rows = _rows(f"{directory}/people.csv", ("id", "name", "birth"))
+        movie_rows = _rows(f"{directory}/movies.csv", ("id", "title", "year"))
+        star_chunks = [_star_ids(f"{directory}/stars.csv")]
+
+    # Load people and movies, with temporary id -> index maps
+    person_index = {}
+    for row in person_rows:
+        person_id = ingest.parse_id(row[0], f"{directory}/people.csv", row)
+        person_index[person_id] = graph.add_person(*row)
+
+    movie_index = {}
+    for row in movie_rows:
+        movie_id = ingest.parse_id(row[0], f"{directory}/movies.csv", row)
+        movie_index[movie_id] = graph.add_movie(*row)
+
+    # Load stars, skipping rows that reference unknown ids
+    star_people = array("i")
+    star_movies = array("i")
+    for person_ids, movie_ids in star_chunks:
+        for person_id, movie_id in zip(person_ids, movie_ids):
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None or m is None:
+                continue
+            star_people.append(p)
+            star_movies.append(m)
+
+    graph.build(star_people, star_movies)
+    return graph
+
+
+def _rows(path, fields):
+    with open(path, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield tuple(row[field] for field in fields)
+
+
+def _star_ids(path):
+    person_ids = array("q")
+    movie_ids = array("q")
+    for row in _rows(path, ("person_id", "movie_id")):
+        person_ids.append(ingest.parse_id(row[0], path, row))
+        movie_ids.append(ingest.parse_id(row[1], path, row))
+    return person_ids, movie_ids
@@ -0,0 +1,140 @@
+"""
+Parallel chunked reading of the degrees CSV files.
+
+Each file is split into byte ranges that start and end on line breaks,
+and a process pool parses the ranges. Results are yielded back in file
+order, so callers see exactly the rows a serial csv.DictReader would.
+Fields must not contain embedded newlines, which holds for the IMDB
+exports this project uses.
+"""
+
+import csv
+import io
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Ranges per worker, so that uneven chunks still balance across the pool
+CHUNKS_PER_WORKER = 4
+
+# Ids the compact graph can store as integers and give back unchanged
+NUMERIC_ID = re.compile(r"0|[1-9][0-9]*")
+
+
+def is_numeric_id(value):
+    return NUMERIC_ID.fullmatch(value) is not None
+
+
+def parse_id(value, path, row):
+    """
+    Returns a numeric id as an int. Any other id, including zero-padded
+    ones that would not read back unchanged, raises ValueError naming
+    the file and row it came from.
+    """
+    if not is_numeric_id(value):
+        raise ValueError(
+            f"{path}: id {value!r} in row {list(row)} is not numeric; "
+            f"the compact graph needs numeric ids without leading zeros"
+        )
+    return int(value)
+
+
+def chunk_ranges(path, chunks):
+    """
+    Returns (start, end) byte ranges covering the rows of a CSV file,
+    excluding the header, with every boundary at the start of a line.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        boundaries = [start]
+        for i in range(1, chunks):
+            f.seek(max(start, size * i // chunks))
+            if f.tell() > start:
+                f.readline()
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return csv.reader(io.StringIO(text))
+
+
+def _parse_rows(path, start, end):
+    """
+    Parses a range of people.csv or movies.csv into a list of 3-tuples.
+    """
+    return [tuple(row) for row in _read_range(path, start, end) if len(row) == 3]
+
+
+def _parse_star_rows(path, start, end):
+    """
+    Parses a range of stars.csv into a list of (person id, movie id)
+    string pairs.
+    """
+    return [tuple(row) for row in _read_range(path, start, end) if len(row) == 2]
+
+
+def _parse_stars(path, start, end):
+    """
+    Parses a range of stars.csv into parallel arrays of person and movie ids.
+    """
+    person_ids = array("q")
+    movie_ids = array("q")
+    for row in _read_range(path, start, end):
+        if len(row) == 2:
+            person_ids.append(parse_id(row[0], path, row))
+            movie_ids.append(parse_id(row[1], path, row))
+    return person_ids, movie_ids
+
+
+def _map_chunks(parse, path, workers):
+    ranges = chunk_ranges(path, workers * CHUNKS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(
+            parse,
+            [path] * len(ranges),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+        )
+
+
+def people_rows(directory, workers):
+    """
+    Yields (id, name, birth) rows of people.csv in file order.
+    """
+    for rows in _map_chunks(_parse_rows, f"{directory}/people.csv", workers):
+        yield from rows
+
+
+def movie_rows(directory, workers):
+    """
+    Yields (id, title, year) rows of movies.csv in file order.
+    """
+    for rows in _map_chunks(_parse_rows, f"{directory}/movies.csv", workers):
+        yield from rows
+
+
+def star_rows(directory, workers):
+    """
+    Yields (person_id, movie_id) rows of stars.csv in file order, with
+    the ids as they appear in the file.
+    """
+    for rows in _map_chunks(_parse_star_rows, f"{directory}/stars.csv", workers):
+        yield from rows
+
+
+def star_chunks(directory, workers):
+    """
+    Yields (person ids, movie ids) integer arrays for chunks of stars.csv,
+    in file order.
+    """
+    yield from _map_chunks(_parse_stars, f"{directory}/stars.csv", workers)
@@ -0,0 +1,212 @@
+"""
+Landmark distance oracle for the compact Graph.
+
+A handful of high-degree people are chosen as landmarks and their BFS
+distances to everyone are stored as uint8 arrays. By the triangle
+inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which gives O(K) bounds on the separation of s and t, and an admissible,
+consistent heuristic for A* search.
+"""
+
+import heapq
+from array import array
+
+from graph import record_stats, trace_path
+from trees import UNREACHABLE, BFSTree, stale_distances
+from util import reverse_path
+
+# Landmarks consulted by the A* heuristic for a single query
+ACTIVE_LANDMARKS = 4
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks=(), dists=()):
+        self.graph = graph
+        self.landmarks = array("i", landmarks)
+        self.dists = list(dists)
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks up to k landmarks among the people in the most movies,
+        skipping people within one degree of a landmark already chosen,
+        and computes their distances to everyone.
+        """
+        index = cls(graph)
+        offsets = graph.person_offsets
+        candidates = sorted(
+            range(graph.num_people()), key=lambda p: offsets[p] - offsets[p + 1]
+        )
+        for p in candidates:
+            if len(index.landmarks) == k or offsets[p + 1] == offsets[p]:
+                break
+            if any(dist[p] <= 1 for dist in index.dists):
+                continue
+            index.landmarks.append(p)
+            index.dists.append(BFSTree(graph, p).dist)
+        return index
+
+    def update(self, edges):
+        """
+        Recomputes the distances of the landmarks that new edges in the
+        graph affect, and extends the others to any people added.
+        """
+        graph = self.graph
+        n = graph.num_people()
+        for i, dist in enumerate(self.dists):
+            if stale_distances(dist, graph, edges):
+                self.dists[i] = BFSTree(graph, self.landmarks[i]).dist
+            elif len(dist) < n:
+                dist.extend(bytearray([UNREACHABLE]) * (n - len(dist)))
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation of two
+        person indexes. lower is None if they are known not to be
+        connected, and upper is None if no landmark reaches both.
+        """
+        lower = 0
+        upper = None
+        for dist in self.dists:
+            ds = dist[source]
+            dt = dist[target]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        A* search between two person indexes using landmark lower bounds.
+        Answers without searching when the bounds meet at a landmark.
+
+        When a landmark reaches both people, the search only looks for
+        paths shorter than the upper bound, and falls back to the path
+        through that landmark if there is none.
+
+        Returns a list of (movie index, person index) pairs, or None.
+        """
+        record_stats(stats, 0, 0)
+        if source == target:
+            return []
+        lower, upper = self.bounds(source, target)
+        if lower is None:
+            return None
+        if upper is not None:
+            for dist in self.dists:
+                if dist[source] + dist[target] == upper:
+                    via_landmark = dist
+                    break
+            if lower == upper:
+                return self._path_via(via_landmark, source, target)
+
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+
+        # Only the landmarks giving the tightest bounds for this query
+        # are consulted, to keep the heuristic cheap
+        active = sorted(
+            ((dist, dist[target]) for dist in self.dists
+             if dist[source] != UNREACHABLE),
+            key=lambda item: -abs(item[0][source] - item[1])
+        )[:ACTIVE_LANDMARKS]
+
+        def heuristic(p):
+            h = 0
+            for dist, dt in active:
+                d = abs(dist[p] - dt)
+                if d > h:
+                    h = d
+            return h
+
+        n = graph.num_people()
+        g = array("i", [-1]) * n
+        parent = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        closed = bytearray(n)
+
+        # Lowest cost at which each movie was expanded
+        movie_g = array("i", [-1]) * graph.num_movies()
+
+        g[source] = 0
+        parent[source] = source
+        heap = [(heuristic(source), 0, source)]
+        expanded = 0
+        peak_frontier = 1
+        while heap:
+            if len(heap) > peak_frontier:
+                peak_frontier = len(heap)
+            f, _, p = heapq.heappop(heap)
+            if closed[p]:
+                continue
+            d = g[p]
+            if p == target:
+                record_stats(stats, expanded, peak_frontier)
+                return trace_path(parent, via, source, target)
+            closed[p] = 1
+            expanded += 1
+
+            if upper is not None and d + 1 >= upper:
+                continue
+
+            # Every open node on a shorter path would have an estimate of
+            # at most d, so if none is left, reaching the target is optimal
+            accept = d + 1 <= f or not heap or heap[0][0] > d
+            for k in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[k]
+                if movie_g[m] != -1 and movie_g[m] <= d:
+                    continue
+                movie_g[m] = d
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if closed[q] or (g[q] != -1 and g[q] <= d + 1):
+                        continue
+                    g[q] = d + 1
+                    parent[q] = p
+                    via[q] = m
+                    if q == target and accept:
+                        record_stats(stats, expanded, peak_frontier)
+                        return trace_path(parent, via, source, target)
+                    estimate = d + 1 + heuristic(q)
+                    if upper is not None and estimate >= upper:
+                        continue
+                    heapq.heappush(heap, (estimate, -(d + 1), q))
+
+        # No path is shorter than the one through the landmark
+        record_stats(stats, expanded, peak_frontier)
+        if upper is not None:
+            return self._path_via(via_landmark, source, target)
+        return None
+
+    def _path_via(self, dist, source, target):
+        """
+        Walks down a landmark's distances from source and from target
+        and joins the two walks at the landmark.
+        """
+        return self._descend(dist, source) + reverse_path(target, self._descend(dist, target))
+
+    def _descend(self, dist, p):
+        """
+        Returns the (movie index, person index) steps from p to the
+        landmark, each one degree closer.
+        """
+        graph = self.graph
+        steps = []
+        while dist[p] != 0:
+            step = next(
+                (m, q) for m, q in graph.neighbors(p) if dist[q] == dist[p] - 1
+            )
+            steps.append(step)
+            p = step[1]
+        return steps
@@ -0,0 +1,140 @@
+"""
+Prefix and fuzzy lookup over the distinct lowercase names in the dataset.
+
+Names are kept sorted in a packed StringTable, so a prefix is a binary
+search followed by a short scan. For fuzzy matches every name is split
+into trigrams, and a CSR posting list maps each trigram (encoded as one
+integer) to the names containing it; candidates are ranked by trigram
+similarity to the query.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+
+from graph import StringTable
+
+# Candidates re-scored exactly after counting shared trigrams
+SHORTLIST = 64
+
+# Trigrams found in more than 1 / COMMON of all names are only counted
+# when they are among the rarer half of the query's trigrams
+COMMON = 50
+
+
+class NameIndex():
+
+    def __init__(self):
+        self.names = StringTable()
+        self.keys = array("q")
+        self.offsets = array("q", [0])
+        self.postings = array("i")
+
+    @classmethod
+    def build(cls, sorted_names):
+        """
+        Builds the index from distinct lowercase names in sorted order.
+        """
+        index = cls()
+        grams = {}
+        for i, name in enumerate(sorted_names):
+            index.names.append(name)
+            for key in trigrams(name):
+                posting = grams.get(key)
+                if posting is None:
+                    posting = grams[key] = array("i")
+                posting.append(i)
+        for key in sorted(grams):
+            index.keys.append(key)
+            index.postings.extend(grams[key])
+            index.offsets.append(len(index.postings))
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit names starting with prefix, in sorted order,
+        or none for a blank prefix.
+        """
+        prefix = prefix.lower()
+        if not prefix.strip():
+            return []
+        names = self.names
+        i = bisect_left(names, prefix)
+        found = []
+        while i < len(names) and len(found) < limit:
+            name = names[i]
+            if not name.startswith(prefix):
+                break
+            found.append(name)
+            i += 1
+        return found
+
+    def fuzzy(self, query, limit=10):
+        """
+        Returns up to limit (score, name) pairs for the names sharing the
+        most trigrams with query, best first. score is the Jaccard
+        similarity of the two trigram sets.
+        """
+        wanted = trigrams(query.lower())
+        spans = []
+        for key in wanted:
+            i = bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                spans.append((self.offsets[i], self.offsets[i + 1]))
+        if not spans:
+            return []
+
+        # Any name sharing most of the query's trigrams shares one of its
+        # rarer half, so the postings of common trigrams beyond that are
+        # only counted while they are short
+        spans.sort(key=lambda span: span[1] - span[0])
+        cutoff = len(self.names) // COMMON
+        shared = {}
+        for rank, (start, end) in enumerate(spans):
+            if rank >= (len(spans) + 1) // 2 and end - start > cutoff:
+                break
+            for j in range(start, end):
+                n = self.postings[j]
+                shared[n] = shared.get(n, 0) + 1
+
+        ranked = []
+        for n in heapq.nlargest(SHORTLIST, shared, key=shared.get):
+            name = self.names[n]
+            grams = trigrams(name)
+            score = len(wanted & grams) / len(wanted | grams)
+            ranked.append((score, name))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked[:limit]
+
+    def search(self, query, limit=10):
+        """
+        Returns up to limit candidate names for query: names it is a
+        prefix of first, then the closest fuzzy matches. A blank query
+        has no candidates.
+        """
+        if not query.strip():
+            return []
+        found = self.prefix(query, limit)
+        if len(found) == limit:
+            return found
+        for _, name in self.fuzzy(query, limit):
+            if len(found) == limit:
+                break
+            if name not in found:
+                found.append(name)
+        return found
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a name padded with spaces, each
+    packed into one integer.
+    """
+    padded = f"  {name} "
+    return {
+        (ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+        for i in range(len(padded) - 2)
+    }
@@ -0,0 +1,189 @@
+"""
+Level-synchronous parallel breadth-first search over a compact Graph.
+
+The CSR adjacency is copied once into multiprocessing.shared_memory, next
+to two bitmaps: people already visited and movies already expanded. Each
+BFS level, the frontier is split into contiguous partitions that worker
+processes expand against the bitmaps of the previous level. The calling
+process merges the discoveries in partition order and updates the
+bitmaps, so parents are assigned exactly as in the serial search.
+"""
+
+import atexit
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from graph import record_stats, trace_path
+
+# Frontiers smaller than this are expanded in the calling process
+MIN_PARALLEL_FRONTIER = 256
+
+# Partitions per worker for each level, to balance uneven expansions
+PARTITIONS_PER_WORKER = 2
+
+ADJACENCY = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+
+# Shared memory attached by a worker process
+_worker = {}
+
+
+class ParallelBFS():
+
+    def __init__(self, graph, workers):
+        self.graph = graph
+        self.workers = workers
+        self.blocks = []
+
+        spec = {}
+        for name in ADJACENCY:
+            values = getattr(graph, name)
+            data = memoryview(values).cast("B")
+            block = self._create(len(data))
+            block.buf[:len(data)] = data
+            spec[name] = (block.name, _typecode(values), len(data))
+        self.visited = self._create((graph.num_people() + 7) // 8)
+        self.expanded = self._create((graph.num_movies() + 7) // 8)
+        spec["visited"] = (self.visited.name, "B", (graph.num_people() + 7) // 8)
+        spec["expanded"] = (self.expanded.name, "B", (graph.num_movies() + 7) // 8)
+
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach, initargs=(spec,)
+        )
+        atexit.register(self.close)
+
+    def _create(self, size):
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.blocks.append(block)
+        return block
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory.
+        """
+        if self.pool is None:
+            return
+        self.pool.shutdown()
+        self.pool = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        atexit.unregister(self.close)
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Breadth-first search between two person indexes, expanding each
+        level in parallel. Returns the same path as Graph.shortest_path.
+        """
+        if source == target:
+            record_stats(stats, 0, 0)
+            return []
+        if self.workers <= 1:
+            return self.graph.shortest_path(source, target, stats=stats)
+
+        graph = self.graph
+        n = graph.num_people()
+        visited = self.visited.buf
+        expanded = self.expanded.buf
+        visited[:len(visited)] = bytes(len(visited))
+        expanded[:len(expanded)] = bytes(len(expanded))
+        adjacency = [getattr(graph, name) for name in ADJACENCY]
+
+        parent = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        parent[source] = source
+        visited[source >> 3] |= 1 << (source & 7)
+
+        frontier = array("i", [source])
+        expanded_people = 0
+        peak_frontier = 1
+        while frontier:
+            expanded_people += len(frontier)
+            if len(frontier) >= MIN_PARALLEL_FRONTIER:
+                parts = self.workers * PARTITIONS_PER_WORKER
+                size = -(-len(frontier) // parts)
+                partitions = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                results = self.pool.map(
+                    _expand_partition, partitions, [target] * len(partitions)
+                )
+            else:
+                results = [expand(*adjacency, visited, expanded, frontier, target)]
+
+            # Merge in partition order, so the first discoverer wins as in
+            # the serial search. The live frontier after each discovery is
+            # what is left of the level after its parent plus the next level
+            position = {p: i for i, p in enumerate(frontier)}
+            next_frontier = array("i")
+            for found, movies in results:
+                for m in movies:
+                    expanded[m >> 3] |= 1 << (m & 7)
+                for i in range(0, len(found), 3):
+                    q = found[i]
+                    if parent[q] != -1:
+                        continue
+                    parent[q] = found[i + 1]
+                    via[q] = found[i + 2]
+                    visited[q >> 3] |= 1 << (q & 7)
+                    live = len(frontier) - position[found[i + 1]] - 1 + len(next_frontier)
+                    if q == target:
+                        # The serial search stops expanding at the parent
+                        expanded_people -= len(frontier) - position[found[i + 1]] - 1
+                        record_stats(stats, expanded_people, max(peak_frontier, live))
+                        return trace_path(parent, via, source, target)
+                    next_frontier.append(q)
+                    peak_frontier = max(peak_frontier, live + 1)
+            frontier = next_frontier
+
+        record_stats(stats, expanded_people, peak_frontier)
+        return None
+
+
+def expand(person_offsets, person_movies, movie_offsets, movie_people,
+           visited, expanded, frontier, target):
+    """
+    Expands one partition of a BFS level against the visited and expanded
+    bitmaps of the previous levels, stopping early if target is reached.
+
+    Returns flat (person, parent, movie) triples for each newly reached
+    person in discovery order, and the movies expanded.
+    """
+    found = array("i")
+    movies = array("i")
+    seen_movies = set()
+    seen_people = set()
+    for p in frontier:
+        for k in range(person_offsets[p], person_offsets[p + 1]):
+            m = person_movies[k]
+            if expanded[m >> 3] & (1 << (m & 7)) or m in seen_movies:
+                continue
+            seen_movies.add(m)
+            movies.append(m)
+            for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                q = movie_people[j]
+                if visited[q >> 3] & (1 << (q & 7)) or q in seen_people:
+                    continue
+                seen_people.add(q)
+                found.extend((q, p, m))
+                if q == target:
+                    return found, movies
+    return found, movies
+
+
+def _typecode(values):
+    if isinstance(values, memoryview):
+        return values.format
+    return values.typecode
+
+
+def _attach(spec):
+    for name, (block_name, typecode, size) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker[name] = (block, block.buf[:size].cast(typecode))
+
+
+def _expand_partition(frontier, target):
+    return expand(
+        *(_worker[name][1] for name in ADJACENCY),
+        _worker["visited"][1], _worker["expanded"][1], frontier, target
+    )
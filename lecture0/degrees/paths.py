@@ -0,0 +1,242 @@
+"""
+Every shortest path, and the k shortest paths, between two people in a
+compact Graph.
+
+A breadth-first search from the source labels distances up to the
+target's level. Walking back from the target, each person keeps every
+(movie, person) step one degree closer to the source, which gives a
+DAG holding only the people on some shortest path. Paths are counted
+over the DAG without listing them, and listed lazily by a depth-first
+walk whose memory is bounded by the path length.
+"""
+
+import heapq
+from array import array
+
+UNREACHED = 255
+
+
+class PathDAG():
+    """
+    The (movie, person) steps of every shortest path from source to
+    target, stored per person as compact parent lists.
+    """
+
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.source = source
+        self.target = target
+
+        # DAG people, and for each a range of (parent slot, movie) steps
+        self.people = array("i")
+        self.offsets = array("q", [0])
+        self.parents = array("i")
+        self.movies = array("i")
+        self.length = self._label_distances()
+        if self.length is None or source == target:
+            return
+
+        dist = self.dist
+        slots = {target: 0}
+        self.people.append(target)
+        slot = 0
+        while slot < len(self.people):
+            q = self.people[slot]
+            d = dist[q]
+            if d > 0:
+                for m, p in graph.neighbors(q):
+                    if dist[p] != d - 1:
+                        continue
+                    parent = slots.get(p)
+                    if parent is None:
+                        parent = slots[p] = len(self.people)
+                        self.people.append(p)
+                    self.parents.append(parent)
+                    self.movies.append(m)
+            self.offsets.append(len(self.parents))
+            slot += 1
+        del self.dist
+
+    def _label_distances(self):
+        """
+        Labels distances from the source until the target is reached,
+        and returns the target's distance, or None if not connected.
+        """
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        self.dist = dist = bytearray([UNREACHED]) * graph.num_people()
+        seen_movie = bytearray(graph.num_movies())
+
+        dist[self.source] = 0
+        frontier = [self.source]
+        depth = 0
+        while frontier and dist[self.target] == UNREACHED and depth < UNREACHED - 1:
+            depth += 1
+            next_frontier = []
+            for p in frontier:
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if seen_movie[m]:
+                        continue
+                    seen_movie[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if dist[q] == UNREACHED:
+                            dist[q] = depth
+                            next_frontier.append(q)
+            frontier = next_frontier
+        d = dist[self.target]
+        return None if d == UNREACHED else d
+
+    def count(self):
+        """
+        Returns the number of shortest paths, without listing them.
+        """
+        if self.length is None:
+            return 0
+        if self.length == 0:
+            return 1
+
+        # People are stored farthest from the source first, so every
+        # person comes after all of the people it leads to
+        counts = [0] * len(self.people)
+        counts[0] = 1
+        for slot in range(len(self.people)):
+            for k in range(self.offsets[slot], self.offsets[slot + 1]):
+                counts[self.parents[k]] += counts[slot]
+        return counts[-1]
+
+    def paths(self, limit=None):
+        """
+        Yields up to limit shortest paths, each a list of
+        (movie index, person index) pairs.
+        """
+        if self.length is None or limit == 0:
+            return
+        if self.length == 0:
+            yield []
+            return
+
+        # Depth-first walk back from the target, one step cursor per level
+        offsets = self.offsets
+        steps = []
+        cursors = [offsets[0]]
+        slots = [0]
+        found = 0
+        while cursors:
+            k = cursors[-1]
+            if k == offsets[slots[-1] + 1]:
+                cursors.pop()
+                slots.pop()
+                if steps:
+                    steps.pop()
+                continue
+            cursors[-1] = k + 1
+            parent = self.parents[k]
+            steps.append((self.movies[k], self.people[slots[-1]]))
+            if self.people[parent] == self.source:
+                yield steps[::-1]
+                found += 1
+                if found == limit:
+                    return
+                steps.pop()
+                continue
+            slots.append(parent)
+            cursors.append(offsets[parent])
+
+
+def k_shortest_paths(graph, source, target, k):
+    """
+    Yields up to k loopless paths from source to target in order of
+    length, each a list of (movie index, person index) pairs.
+
+    The shortest paths come straight from the PathDAG. Longer ones are
+    found with Yen's algorithm, one breadth-first search per deviation
+    from a path already yielded.
+    """
+    found = []
+    for path in PathDAG(graph, source, target).paths(limit=k):
+        found.append(path)
+        yield path
+    if not found or len(found) == k:
+        return
+
+    candidates = []
+    seen = {tuple(path) for path in found}
+    spurred = 0
+    while len(found) < k:
+        for path in found[spurred:]:
+            for candidate in _deviations(graph, source, target, path, found):
+                key = tuple(candidate)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(candidates, (len(candidate), len(seen), candidate))
+        spurred = len(found)
+        if not candidates:
+            return
+        path = heapq.heappop(candidates)[2]
+        found.append(path)
+        yield path
+
+
+def _deviations(graph, source, target, path, found):
+    """
+    Yields the shortest paths that follow path up to some person and
+    then leave it by a step no path in found takes from there.
+    """
+    people = [source] + [p for _, p in path]
+    for i in range(len(path)):
+        root = path[:i]
+        banned_steps = {other[i] for other in found if len(other) > i and other[:i] == root}
+        spur = _avoiding_path(graph, people[i], target, set(people[:i]), banned_steps)
+        if spur is not None:
+            yield root + spur
+
+
+def _avoiding_path(graph, source, target, banned_people, banned_steps):
+    """
+    Breadth-first search that never visits banned_people and never
+    takes a (movie, person) step in banned_steps out of the source.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+    parent = {source: None}
+    seen_movie = set()
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for p in frontier:
+            for k in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[k]
+                if m in seen_movie:
+                    continue
+
+                # A movie with a banned step out of the source stays open,
+                # so its other cast can still be reached through it later
+                partial = False
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_people[j]
+                    if q in parent or q in banned_people:
+                        continue
+                    if p == source and (m, q) in banned_steps:
+                        partial = True
+                        continue
+                    parent[q] = (m, p)
+                    if q == target:
+                        path = []
+                        while q != source:
+                            m, previous = parent[q]
+                            path.append((m, q))
+                            q = previous
+                        path.reverse()
+                        return path
+                    next_frontier.append(q)
+                if not partial:
+                    seen_movie.add(m)
+        frontier = next_frontier
+    return None
@@ -0,0 +1,270 @@
+"""
+Long-running degrees query server.
+
+Loads the data once, then answers newline-delimited JSON queries on stdin
+or on a local Unix socket, one JSON response per line:
+
+    {"id": 1, "source": "102", "target": "158"}
+    {"id": 1, "degrees": 1, "path": [["112384", "158"]], "cached": false, "ms": 0.05}
+
+People may be given by IMDB id ("source", "target") or by an unambiguous
+name ("source_name", "target_name"), and "method" selects the search.
+
+{"ingest": "delta"} applies the people.csv, movies.csv and stars.csv
+found in the delta directory, and answers with the number of new stars.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import time
+from collections import OrderedDict
+
+import degrees
+from util import reverse_path
+
+MISSING = object()
+
+
+class LRUCache():
+    """
+    Least-recently-used mapping with a fixed capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or MISSING.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def prune(self, keep):
+        """
+        Drops every entry for which keep(key, value) is false.
+        """
+        for key, value in list(self.entries.items()):
+            if not keep(key, value):
+                del self.entries[key]
+
+
+class QueryServer():
+    """
+    Answers separation queries against the loaded degrees data,
+    caching results per unordered pair of people.
+    """
+
+    def __init__(self, cache_size=10000, method="bfs"):
+        self.cache = LRUCache(cache_size)
+        self.method = method
+        self.queries = 0
+
+    def query(self, source, target, method=None):
+        """
+        Returns (path, cached) for a pair of person ids. A mirrored pair
+        is served from the cache by reversing the stored path.
+        """
+        key = (source, target) if source <= target else (target, source)
+        path = self.cache.get(key)
+        cached = path is not MISSING
+        if not cached:
+            path = degrees.shortest_path(key[0], key[1], method=method or self.method)
+            self.cache.put(key, path)
+        if path is not None and key[0] != source:
+            path = reverse_path(key[0], path)
+        return path, cached
+
+    def ingest(self, directory):
+        """
+        Applies the delta CSV files in directory to the loaded data and
+        drops the cached paths the new stars could shorten.
+
+        Returns the number of new stars.
+        """
+        if not isinstance(directory, str):
+            raise ValueError(f"ingest expects a directory path, not {directory!r}")
+        stars = degrees.ingest_directory(directory)
+        if stars:
+            self.invalidate(person_id for person_id, _ in stars)
+        return len(stars)
+
+    def invalidate(self, person_ids):
+        """
+        Drops the cached results that new stars of person_ids could change.
+
+        Every new connection passes through one of those people, so a
+        cached path of length L between s and t can only get shorter if
+        d(s, P) + d(P, t) < L, where d(x, P) is the distance to the
+        nearest of them. Only the distances needed are searched.
+        """
+        lengths = [
+            None if path is None else len(path)
+            for path in self.cache.entries.values()
+        ]
+        if None in lengths:
+            limit = None
+        elif lengths and max(lengths) > 1:
+            limit = max(lengths) - 1
+        else:
+            return
+        dist = degrees.distances_from_any(set(person_ids), limit)
+
+        def keep(key, path):
+            ds = dist.get(key[0])
+            dt = dist.get(key[1])
+            if ds is None or dt is None:
+                return True
+            return path is not None and ds + dt >= len(path)
+
+        self.cache.prune(keep)
+
+    def handle(self, line):
+        """
+        Answers one JSON query line and returns the JSON response line.
+        """
+        start_time = time.perf_counter()
+        self.queries += 1
+        response = {}
+        try:
+            request = json.loads(line)
+            response["id"] = request.get("id")
+            if "ingest" in request:
+                response["stars"] = self.ingest(request["ingest"])
+                response["ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+                return json.dumps(response)
+            source = self._person(request, "source")
+            target = self._person(request, "target")
+            method = request.get("method", self.method)
+            if method not in degrees.METHODS:
+                raise ValueError(f"unknown method: {method}")
+            if method not in degrees.available_methods():
+                raise ValueError(f"the {method} method needs the compact graph")
+            path, cached = self.query(source, target, method)
+        except (ValueError, AttributeError, OSError) as e:
+            response["error"] = str(e)
+        else:
+            if path is None:
+                response["degrees"] = None
+                response["path"] = None
+            else:
+                response["degrees"] = len(path)
+                response["path"] = [list(step) for step in path]
+            response["cached"] = cached
+        response["ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+        return json.dumps(response)
+
+    def _person(self, request, field):
+        if field in request:
+            person_id = str(request[field])
+            if not _known(person_id):
+                raise ValueError(f"unknown person id: {person_id}")
+            return person_id
+        if f"{field}_name" not in request:
+            raise ValueError(f"missing {field} or {field}_name")
+        name = request[f"{field}_name"]
+        person_ids = degrees.person_ids_for_name(name)
+        if len(person_ids) != 1:
+            raise ValueError(f"{len(person_ids)} people named {name!r}: {sorted(person_ids)}")
+        return person_ids[0]
+
+
+def _known(person_id):
+    if degrees.graph is not None:
+        return degrees.graph.person_index(person_id) is not None
+    return person_id in degrees.people
+
+
+def serve_stdio(server, infile=sys.stdin, outfile=sys.stdout):
+    for line in infile:
+        if line.strip():
+            print(server.handle(line), file=outfile, flush=True)
+
+
+def serve_socket(server, path):
+    """
+    Serves queries on a Unix socket, one connection at a time.
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write(server.handle(line).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.UnixStreamServer(path, Handler) as unix_server:
+        try:
+            unix_server.serve_forever()
+        finally:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python server.py [directory] [--socket PATH]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of stdin")
+    parser.add_argument("--compact", action="store_true",
+                        help="load into a compact integer-indexed graph (ids must be numeric)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a cached binary snapshot")
+    parser.add_argument("--workers", type=int,
+                        help="parse the CSV files with this many processes")
+    parser.add_argument("--method", choices=degrees.METHODS, default="bfs",
+                        help="default search strategy")
+    parser.add_argument("--cache-size", type=int, default=10000,
+                        help="number of query results to keep")
+    args = parser.parse_args()
+    if args.method in degrees.COMPACT_METHODS and not (args.compact or args.snapshot):
+        parser.error(f"--method {args.method} needs --compact or --snapshot")
+
+    print("Loading data...", file=sys.stderr)
+    try:
+        degrees.load_data(args.directory, compact=args.compact, snapshot=args.snapshot,
+                          workers=args.workers)
+    except ValueError as e:
+        sys.exit(str(e))
+    print("Data loaded.", file=sys.stderr)
+
+    server = QueryServer(cache_size=args.cache_size, method=args.method)
+    try:
+        if args.socket:
+            serve_socket(server, args.socket)
+        else:
+            serve_stdio(server)
+    except KeyboardInterrupt:
+        pass
+    cache = server.cache
+    print(f"{server.queries} queries, {cache.hits} cache hits", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
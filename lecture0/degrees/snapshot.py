@@ -0,0 +1,210 @@
+"""
+Binary on-disk snapshot of a compact Graph.
+
+The snapshot holds every array of the Graph back to back, after a small
+JSON header recording the CSV files it was built from. Loading memory-maps
+the file and wraps each section in a memoryview, so nothing is parsed and
+pages are only read in when a lookup or search touches them.
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+
+from graph import Graph, load_graph
+
+MAGIC = b"DEGSNAP1"
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored in the snapshot, as (name, typecode)
+SECTIONS = (
+    ("person_ids", "q"),
+    ("person_names.data", "B"),
+    ("person_names.offsets", "q"),
+    ("person_births", "H"),
+    ("movie_ids", "q"),
+    ("movie_titles.data", "B"),
+    ("movie_titles.offsets", "q"),
+    ("movie_years", "H"),
+    ("person_order", "i"),
+    ("movie_order", "i"),
+    ("name_order", "i"),
+    ("person_offsets", "q"),
+    ("person_movies", "i"),
+    ("movie_offsets", "q"),
+    ("movie_people", "i"),
+)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def source_stamps(directory):
+    """
+    Returns the [mtime_ns, size] of each CSV file, used to detect stale snapshots.
+    """
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps[name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def save_snapshot(graph, path, stamps):
+    """
+    Writes graph to path, replacing any existing snapshot atomically.
+    """
+    buffers = []
+    sections = {}
+    offset = 0
+    for name, typecode in SECTIONS:
+        data = memoryview(_get(graph, name)).cast("B")
+        offset = _align(offset)
+        sections[name] = [typecode, offset, len(data)]
+        buffers.append((offset, data))
+        offset += len(data)
+
+    header = json.dumps({
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "sources": stamps,
+        "sections": sections,
+    }).encode("utf-8")
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<q", len(header)))
+        f.write(header)
+        for start, data in buffers:
+            f.write(bytes(base + start - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path, stamps=None):
+    """
+    Memory-maps a snapshot and returns a Graph backed by it.
+
+    Returns None if the file is missing, malformed, or was built from
+    CSV files that do not match stamps.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        try:
+            (length,) = struct.unpack("<q", f.read(8))
+            header = json.loads(f.read(length))
+            if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+                return None
+            if stamps is not None and header["sources"] != stamps:
+                return None
+            sections = header["sections"]
+            if sorted(sections) != sorted(name for name, _ in SECTIONS):
+                return None
+        except (struct.error, ValueError, KeyError, TypeError):
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    base = _align(len(MAGIC) + 8 + length)
+    for name, typecode in SECTIONS:
+        if not _fits(sections[name], typecode, base, len(buffer)):
+            buffer.close()
+            return None
+
+    view = memoryview(buffer)
+    graph = Graph()
+    for name, (typecode, offset, size) in sections.items():
+        section = view[base + offset:base + offset + size]
+        _set(graph, name, section.cast(typecode))
+    return graph
+
+
+def _fits(section, typecode, base, length):
+    """
+    Returns whether a [typecode, offset, size] header entry describes
+    whole items of the expected type that lie inside the file.
+    """
+    try:
+        stored, offset, size = section
+        return (
+            stored == typecode
+            and isinstance(offset, int) and isinstance(size, int)
+            and offset >= 0 and size >= 0
+            and size % struct.calcsize(typecode) == 0
+            and base + offset + size <= length
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def load_cached_graph(directory, path=None, workers=None):
+    """
+    Returns the Graph for directory, from its snapshot if it is up to date,
+    otherwise by parsing the CSV files and writing a fresh snapshot.
+    """
+    if path is None:
+        path = snapshot_path(directory)
+    stamps = source_stamps(directory)
+    graph = load_snapshot(path, stamps)
+    if graph is None:
+        graph = load_graph(directory, workers=workers)
+        save_snapshot(graph, path, stamps)
+    return graph
+
+
+def append_sources(directory, person_rows=(), movie_rows=(), star_rows=()):
+    """
+    Appends delta rows to the CSV files of directory, so that they stay
+    the source of truth for a snapshot saved afterwards.
+    """
+    for name, rows in zip(SOURCES, (person_rows, movie_rows, star_rows)):
+        if not rows:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
+
+
+def update_snapshot(graph, directory, path=None):
+    """
+    Rewrites the snapshot of directory from an updated graph, stamped
+    with the current CSV files.
+    """
+    if path is None:
+        path = snapshot_path(directory)
+    save_snapshot(graph, path, source_stamps(directory))
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _get(graph, name):
+    value = graph
+    for part in name.split("."):
+        value = getattr(value, part)
+    return value
+
+
+def _set(graph, name, value):
+    *parents, attr = name.split(".")
+    target = graph
+    for part in parents:
+        target = getattr(target, part)
+    setattr(target, attr, value)
@@ -0,0 +1,195 @@
+"""
+Single-source breadth-first search trees over a compact Graph.
+"""
+
+from array import array
+from collections import OrderedDict
+
+# Distance stored for people the source cannot reach
+UNREACHABLE = 255
+
+
+class BFSTree():
+    """
+    Result of one breadth-first search from a source person index:
+    the parent person, connecting movie and distance of every person.
+    """
+
+    def __init__(self, graph, source):
+        n = graph.num_people()
+        self.source = source
+        self.parent = array("i", [-1]) * n
+        self.via = array("i", [-1]) * n
+        self.dist = bytearray([UNREACHABLE]) * n
+        self.reached = 1
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        parent = self.parent
+        via = self.via
+        dist = self.dist
+        seen_movie = bytearray(graph.num_movies())
+
+        parent[source] = source
+        dist[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier and depth < UNREACHABLE - 1:
+            depth += 1
+            next_frontier = []
+            for p in frontier:
+                for k in range(person_offsets[p], person_offsets[p + 1]):
+                    m = person_movies[k]
+                    if seen_movie[m]:
+                        continue
+                    seen_movie[m] = 1
+                    for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                        q = movie_people[j]
+                        if parent[q] != -1:
+                            continue
+                        parent[q] = p
+                        via[q] = m
+                        dist[q] = depth
+                        next_frontier.append(q)
+            self.reached += len(next_frontier)
+            frontier = next_frontier
+
+    def nbytes(self):
+        return (
+            self.parent.itemsize * len(self.parent)
+            + self.via.itemsize * len(self.via)
+            + len(self.dist)
+        )
+
+    def distance(self, target):
+        """
+        Returns the degrees of separation to target, or None if unreachable.
+        """
+        d = self.dist[target]
+        return None if d == UNREACHABLE else d
+
+    def path_to(self, target):
+        """
+        Returns the list of (movie index, person index) pairs from the
+        source to target, or None if unreachable.
+        """
+        if self.dist[target] == UNREACHABLE:
+            return None
+        path = []
+        node = target
+        while node != self.source:
+            path.append((self.via[node], node))
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+    def affected_by(self, graph, edges):
+        """
+        Returns whether new (person index, movie index) edges, already
+        merged into graph, change any distance in the tree.
+
+        Each edge makes its person a co-star of the movie's cast. The
+        distances stay valid as long as no new co-star pair is more than
+        one degree apart in the tree.
+        """
+        return stale_distances(self.dist, graph, edges)
+
+    def grow(self, n):
+        """
+        Extends the tree to n people, marking the new ones unreachable.
+        """
+        extra = n - len(self.dist)
+        if extra > 0:
+            self.parent.extend(array("i", [-1]) * extra)
+            self.via.extend(array("i", [-1]) * extra)
+            self.dist.extend(bytearray([UNREACHABLE]) * extra)
+
+    def distances(self):
+        """
+        Yields (person index, distance) for every reachable person.
+        """
+        for p, d in enumerate(self.dist):
+            if d != UNREACHABLE:
+                yield p, d
+
+
+def stale_distances(dist, graph, edges):
+    """
+    Returns whether the distances from one source, computed before the
+    (person index, movie index) edges were merged into graph, no longer
+    hold. People beyond the end of dist count as unreachable.
+    """
+    n = len(dist)
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+    for p, m in edges:
+        d = dist[p] if p < n else UNREACHABLE
+        for j in range(movie_offsets[m], movie_offsets[m + 1]):
+            q = movie_people[j]
+            e = dist[q] if q < n else UNREACHABLE
+            if d != e and (d == UNREACHABLE or e == UNREACHABLE or abs(d - e) > 1):
+                return True
+    return False
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of BFS trees keyed by source,
+    holding at most max_bytes of tree arrays.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.trees)
+
+    def peek(self, source):
+        """
+        Returns the cached tree for source, or None, without building one.
+        """
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.trees.move_to_end(source)
+            self.hits += 1
+        return tree
+
+    def get(self, graph, source):
+        """
+        Returns the tree for source, building and caching it if needed.
+        """
+        tree = self.peek(source)
+        if tree is not None:
+            return tree
+        self.misses += 1
+        tree = BFSTree(graph, source)
+        if tree.nbytes() <= self.max_bytes:
+            self.trees[source] = tree
+            self.nbytes += tree.nbytes()
+            while self.nbytes > self.max_bytes:
+                _, evicted = self.trees.popitem(last=False)
+                self.nbytes -= evicted.nbytes()
+        return tree
+
+    def update(self, graph, edges):
+        """
+        Drops the trees that new edges in graph affect, and extends the
+        others to any people added since they were built.
+        """
+        for source, tree in list(self.trees.items()):
+            self.nbytes -= tree.nbytes()
+            if tree.affected_by(graph, edges):
+                del self.trees[source]
+                continue
+            tree.grow(graph.num_people())
+            self.nbytes += tree.nbytes()
+
+    def clear(self):
+        self.trees.clear()
+        self.nbytes = 0
@@ -1,3 +1,8 @@
+import heapq
+import itertools
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -5,15 +10,42 @@ class Node():
         self.action = action
 
 
+def reverse_path(source, path):
+    """
+    Turns a list of (action, state) pairs leading from source
+    into the same path walked back to source.
+    """
+    states = [source] + [state for _, state in path]
+    return [
+        (path[i][0], states[i])
+        for i in range(len(path) - 1, -1, -1)
+    ]
+
+
 class StackFrontier():
+    """
+    Frontier backed by a deque, with a count of queued nodes per state
+    so that contains_state is a hash lookup.
+
+    Keeps counters of pushes, pops and the peak frontier size.
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
+        self.pushes = 0
+        self.pops = 0
+        self.peak_size = 0
+
+    def __len__(self):
+        return len(self.frontier)
 
     def add(self, node):
         self.frontier.append(node)
+        self._track(node)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +54,27 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._untrack(node)
             return node
 
+    def stats(self):
+        return {"pushes": self.pushes, "pops": self.pops, "peak_size": self.peak_size}
+
+    def _track(self, node):
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+        self.pushes += 1
+        if len(self.frontier) > self.peak_size:
+            self.peak_size = len(self.frontier)
+
+    def _untrack(self, node):
+        count = self.states[node.state]
+        if count == 1:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count - 1
+        self.pops += 1
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +82,30 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._untrack(node)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest priority first,
+    and the earliest added among equal priorities.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = itertools.count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self._track(node)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._untrack(node)
             return node
@@ -0,0 +1,116 @@
+"""
+Benchmark for Maze.solve over generated mazes.
+
+Every solver strategy runs on the same mazes, generated for each kind,
+size and seed. Each solve is timed on its own, then repeated under
+tracemalloc for its peak allocation, and the explored states, path
+length, time and peak memory are reported per kind, size and method.
+
+Usage: python benchmark.py [--kinds K,...] [--sizes N,...] [--seeds S] [--methods M,...] [--json]
+"""
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+import generate
+from maze import METHODS, Maze
+
+
+def run_solve(maze, method):
+    """
+    Solves maze with method and returns its measurements. The field
+    and hpa methods are measured from scratch, including building the
+    field or hierarchy.
+    """
+    maze.field = None
+    maze.hierarchy = None
+    try:
+        maze.solve(method)
+    except Exception as e:
+        if str(e) != "no solution":
+            raise
+        maze.solution = None
+    result = {
+        "explored": maze.num_explored,
+        "length": None if maze.solution is None else len(maze.solution[0]),
+        "seconds": maze.elapsed,
+    }
+
+    maze.field = None
+    maze.hierarchy = None
+    tracemalloc.start()
+    try:
+        maze.solve(method)
+    except Exception:
+        pass
+    result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def summarize(results):
+    """
+    Aggregates the measurements of one method over a group of mazes.
+    """
+    lengths = [r["length"] for r in results if r["length"] is not None]
+    return {
+        "mazes": len(results),
+        "explored": round(sum(r["explored"] for r in results) / len(results), 1),
+        "length": round(sum(lengths) / len(lengths), 1) if lengths else None,
+        "ms": round(sum(r["seconds"] for r in results) / len(results) * 1000, 3),
+        "peak_kb": round(max(r["peak_bytes"] for r in results) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python benchmark.py [--sizes N,...] [--json]")
+    parser.add_argument("--kinds", default=",".join(generate.KINDS),
+                        help="comma-separated maze kinds")
+    parser.add_argument("--sizes", default="51,201",
+                        help="comma-separated side lengths of square mazes")
+    parser.add_argument("--seeds", type=int, default=3, help="mazes per kind and size")
+    parser.add_argument("--methods", default=",".join(METHODS),
+                        help="comma-separated search strategies")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    kinds = args.kinds.split(",")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    methods = args.methods.split(",")
+    for method in methods:
+        if method not in METHODS:
+            sys.exit(f"unknown method: {method}")
+
+    report = []
+    for kind in kinds:
+        for size in sizes:
+            results = {method: [] for method in methods}
+            for seed in range(args.seeds):
+                try:
+                    maze = Maze.from_text(generate.generate(kind, size, size, seed))
+                except ValueError as e:
+                    sys.exit(str(e))
+                for method in methods:
+                    results[method].append(run_solve(maze, method))
+            for method in methods:
+                report.append({
+                    "kind": kind, "size": size, "method": method,
+                    **summarize(results[method]),
+                })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'kind':<9}{'size':>6}  {'method':<10}{'explored':>11}{'length':>9}"
+          f"{'ms':>11}{'peak KB':>11}")
+    for row in report:
+        length = "-" if row["length"] is None else f"{row['length']:.1f}"
+        print(f"{row['kind']:<9}{row['size']:>6}  {row['method']:<10}"
+              f"{row['explored']:>11.1f}{length:>9}{row['ms']:>11.3f}{row['peak_kb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
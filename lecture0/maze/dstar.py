@@ -0,0 +1,174 @@
+"""
+Incremental replanning on a Maze whose walls change, with D* Lite.
+
+The search runs backwards from the goal and keeps, for every cell, its
+distance estimate g and a one-step lookahead rhs computed from its
+neighbors. A wall change only makes the cells next to it inconsistent,
+and the next plan re-expands just the cells whose distance to the goal
+changed on the way to the start, instead of searching from scratch.
+"""
+
+import heapq
+import itertools
+import time
+from array import array
+
+# Distance of cells that cannot reach the goal
+INF = 2 ** 31 - 1
+
+
+class DStarLite():
+    """
+    Keeps a shortest path from maze.start to maze.goal up to date while
+    walls are added and removed with set_wall and the start moves.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        size = len(maze.grid)
+        self.g = array("i", [INF]) * size
+        self.rhs = array("i", [INF]) * size
+
+        # Heap of (key, counter, cell); an entry is current only while
+        # queued[cell] holds the same key
+        self.heap = []
+        self.queued = {}
+        self.counter = itertools.count()
+
+        self.goal = maze.index(maze.goal)
+        self.start = maze.index(maze.start)
+        self.last_start = self.start
+        self.km = 0
+        self.num_explored = 0
+
+        self.rhs[self.goal] = 0
+        self._push(self.goal)
+
+    def _h(self, a, b):
+        ar, ac = divmod(a, self.maze.stride)
+        br, bc = divmod(b, self.maze.stride)
+        return abs(ar - br) + abs(ac - bc)
+
+    def _key(self, cell):
+        d = min(self.g[cell], self.rhs[cell])
+        return (d + self._h(self.start, cell) + self.km, d)
+
+    def _push(self, cell):
+        key = self._key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.heap, (key, next(self.counter), cell))
+
+    def _top(self):
+        """Returns the smallest current (key, cell), dropping stale entries."""
+        heap = self.heap
+        while heap:
+            key, _, cell = heap[0]
+            if self.queued.get(cell) == key:
+                return key, cell
+            heapq.heappop(heap)
+        return (INF, INF), None
+
+    def _update(self, cell):
+        grid = self.maze.grid
+        if cell != self.goal:
+            best = INF
+            if not grid[cell]:
+                for _, offset in self.maze.offsets:
+                    neighbor = cell + offset
+                    if not grid[neighbor] and self.g[neighbor] < best:
+                        best = self.g[neighbor]
+            self.rhs[cell] = best if best == INF else best + 1
+        self.queued.pop(cell, None)
+        if self.g[cell] != self.rhs[cell]:
+            self._push(cell)
+
+    def _compute(self):
+        g = self.g
+        rhs = self.rhs
+        grid = self.maze.grid
+        offsets = self.maze.offsets
+        while True:
+            key, cell = self._top()
+            start = self.start
+            if cell is None or (key >= self._key(start) and rhs[start] == g[start]):
+                return
+            new_key = self._key(cell)
+            if key < new_key:
+                self._push(cell)
+                continue
+            heapq.heappop(self.heap)
+            del self.queued[cell]
+            self.num_explored += 1
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+            else:
+                g[cell] = INF
+                self._update(cell)
+            for _, offset in offsets:
+                neighbor = cell + offset
+                if not grid[neighbor]:
+                    self._update(neighbor)
+
+    def set_wall(self, state, wall=True):
+        """
+        Adds or removes the wall at a (row, col) state. The path is
+        repaired on the next call to plan.
+        """
+        maze = self.maze
+        cell = maze.index(state)
+        if cell in (self.goal, self.start) and wall:
+            raise ValueError("cannot wall in the start or the goal")
+        if not (0 <= state[0] < maze.height and 0 <= state[1] < maze.width):
+            raise ValueError(f"cell outside the maze: {state}")
+        if maze.grid[cell] == wall:
+            return
+        maze.grid[cell] = 1 if wall else 0
+        maze.field = None
+        maze.hierarchy = None
+        self._update(cell)
+        for _, offset in maze.offsets:
+            neighbor = cell + offset
+            if not maze.grid[neighbor]:
+                self._update(neighbor)
+
+    def move_start(self, state):
+        """
+        Moves the start to a (row, col) state, such as the next cell of
+        the current path, keeping the search state.
+        """
+        self.km += self._h(self.last_start, self.maze.index(state))
+        self.maze.start = state
+        self.start = self.last_start = self.maze.index(state)
+
+    def plan(self):
+        """
+        Repairs the search after any changes and returns the
+        (actions, cells) solution from the start, or None if the goal
+        cannot be reached. Sets num_explored and elapsed for this call,
+        and the maze's solution.
+        """
+        start_time = time.perf_counter()
+        self.num_explored = 0
+        self._compute()
+        self.maze.solution = self._path()
+        self.elapsed = time.perf_counter() - start_time
+        return self.maze.solution
+
+    def _path(self):
+        maze = self.maze
+        g = self.g
+        cell = self.start
+        if g[cell] == INF:
+            return None
+        actions = []
+        cells = []
+        while cell != self.goal:
+            action, offset = min(
+                ((action, offset) for action, offset in maze.offsets
+                 if not maze.grid[cell + offset]),
+                key=lambda move: g[cell + move[1]]
+            )
+            cell += offset
+            actions.append(action)
+            cells.append(maze.cell(cell))
+        return (actions, cells)
@@ -0,0 +1,157 @@
+"""
+Procedural mazes in the text format read by maze.Maze.
+
+"perfect" mazes have exactly one path between any two cells, "braided"
+mazes are perfect mazes with dead ends knocked through into loops, and
+"open" grids are scattered walls around a guaranteed path. The start is
+always at the top left and the goal at the bottom right.
+
+Usage: python generate.py KIND HEIGHT WIDTH [--seed S] [-o maze.txt]
+"""
+
+import argparse
+import random
+import sys
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+
+def perfect(height, width, seed=None):
+    """
+    Returns a maze carved by a randomized depth-first search over the
+    cells at odd coordinates, so that walls are one cell thick.
+    """
+    rows, _ = _carve(height, width, random.Random(seed))
+    return _text(rows)
+
+
+def braided(height, width, seed=None, braid=1.0):
+    """
+    Returns a perfect maze in which each dead end, with probability
+    braid, has a wall knocked out into a neighboring passage.
+    """
+    rng = random.Random(seed)
+    rows, cells = _carve(height, width, rng)
+    for r, c in cells:
+        exits = [(dr, dc) for dr, dc in _STEPS if rows[r + dr][c + dc] == OPEN]
+        if len(exits) != 1 or rng.random() >= braid:
+            continue
+        walls = [
+            (dr, dc) for dr, dc in _STEPS
+            if rows[r + dr][c + dc] == WALL
+            and 0 < r + 2 * dr < height - 1 and 0 < c + 2 * dc < width - 1
+        ]
+        if walls:
+            dr, dc = rng.choice(walls)
+            rows[r + dr][c + dc] = OPEN
+    return _text(rows)
+
+
+def open_grid(height, width, seed=None, density=0.2):
+    """
+    Returns a grid where each cell is a wall with probability density,
+    except along a random monotone path from the start to the goal.
+    """
+    rng = random.Random(seed)
+    rows = [
+        bytearray(WALL if rng.random() < density else OPEN for _ in range(width))
+        for _ in range(height)
+    ]
+    r = c = 0
+    rows[r][c] = OPEN
+    while (r, c) != (height - 1, width - 1):
+        if c == width - 1 or (r < height - 1 and rng.random() < 0.5):
+            r += 1
+        else:
+            c += 1
+        rows[r][c] = OPEN
+    rows[0][0] = ord("A")
+    rows[height - 1][width - 1] = ord("B")
+    return _text(rows)
+
+
+# Maze generators by kind, each called as f(height, width, seed)
+KINDS = {
+    "perfect": perfect,
+    "braided": braided,
+    "open": open_grid,
+}
+
+_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def generate(kind, height, width, seed=None):
+    """
+    Returns the text of a maze of the given kind and size.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown maze kind: {kind}")
+    if height < 3 or width < 3:
+        raise ValueError("mazes must be at least 3x3")
+    return KINDS[kind](height, width, seed)
+
+
+def _carve(height, width, rng):
+    """
+    Carves passages between the odd cells with an iterative randomized
+    depth-first search. Returns the rows and the cells in carving order.
+    """
+    rows = [bytearray([WALL]) * width for _ in range(height)]
+
+    # Largest odd row and column inside the outer wall
+    last_row = height - 2 if height % 2 == 1 else height - 3
+    last_col = width - 2 if width % 2 == 1 else width - 3
+    if (last_row, last_col) == (1, 1):
+        raise ValueError("maze too small to separate the start and the goal")
+
+    rows[1][1] = OPEN
+    cells = [(1, 1)]
+    stack = [(1, 1)]
+    while stack:
+        r, c = stack[-1]
+        unvisited = [
+            (dr, dc) for dr, dc in _STEPS
+            if 1 <= r + 2 * dr <= last_row and 1 <= c + 2 * dc <= last_col
+            and rows[r + 2 * dr][c + 2 * dc] == WALL
+        ]
+        if not unvisited:
+            stack.pop()
+            continue
+        dr, dc = rng.choice(unvisited)
+        rows[r + dr][c + dc] = OPEN
+        rows[r + 2 * dr][c + 2 * dc] = OPEN
+        cells.append((r + 2 * dr, c + 2 * dc))
+        stack.append((r + 2 * dr, c + 2 * dc))
+
+    rows[1][1] = ord("A")
+    rows[last_row][last_col] = ord("B")
+    return rows, cells
+
+
+def _text(rows):
+    return "\n".join(row.decode("ascii") for row in rows) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python generate.py KIND HEIGHT WIDTH")
+    parser.add_argument("kind", choices=list(KINDS))
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("-o", "--output", help="file to write instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        text = generate(args.kind, args.height, args.width, args.seed)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Hierarchical pathfinding (HPA*) over a Maze.
+
+The grid is split into square clusters. Wherever two neighboring
+clusters share a run of open cells along their border, one transition
+is placed in the middle of the run, or one at each end of long runs.
+The cells on either side of a transition become abstract nodes, joined
+across the border by a one-step edge and, inside each cluster, to the
+other nodes of the cluster by their local BFS distance.
+
+A query connects the start and goal to the nodes of their clusters,
+runs A* on the small abstract graph, and refines each abstract edge
+into cells with a BFS confined to one cluster. Paths are close to
+shortest but not guaranteed to be, since they may only cross cluster
+borders at transitions.
+"""
+
+import heapq
+import zlib
+from array import array
+
+# Side of a cluster, in cells
+CLUSTER_SIZE = 32
+
+# Border runs at least this long get a transition at each end
+LONG_ENTRANCE = 6
+
+MAGIC = b"MAZEHPA1"
+
+
+class Hierarchy():
+    """
+    Abstract graph of a maze's clusters, built once and reused for any
+    start and goal, or saved and loaded for an unchanged maze.
+    """
+
+    def __init__(self, maze, cluster_size=CLUSTER_SIZE, build=True):
+        self.maze = maze
+        self.cluster_size = cluster_size
+
+        # Padded cell index of each abstract node, and the weighted
+        # edges between nodes as CSR arrays
+        self.nodes = array("i")
+        self.offsets = array("q", [0])
+        self.targets = array("i")
+        self.costs = array("i")
+
+        self._members = None
+        self._local = None
+
+        # Cells visited while building, and by the last query
+        self.reached = 0
+        self.num_explored = 0
+        if build:
+            self._build()
+
+    def _build(self):
+        node_of = {}
+        edges = {}
+
+        def node(cell):
+            n = node_of.get(cell)
+            if n is None:
+                n = node_of[cell] = len(self.nodes)
+                self.nodes.append(cell)
+                edges[n] = {}
+            return n
+
+        def connect(a, b, cost):
+            if cost < edges[a].get(b, cost + 1):
+                edges[a][b] = cost
+                edges[b][a] = cost
+
+        # Transitions across the borders between clusters
+        for first, second in self._entrances():
+            connect(node(first), node(second), 1)
+
+        # Distances between the nodes of each cluster
+        for cluster, members in self.members().items():
+            cells = [self.nodes[n] for n in members]
+            for i, n in enumerate(members):
+                dist = self._local_distances(cluster, cells[i], cells[i + 1:])
+                for other, cell in zip(members[i + 1:], cells[i + 1:]):
+                    if cell in dist:
+                        connect(n, other, dist[cell])
+
+        for n in range(len(self.nodes)):
+            for target in sorted(edges[n]):
+                self.targets.append(target)
+                self.costs.append(edges[n][target])
+            self.offsets.append(len(self.targets))
+        self.reached = self.num_explored
+
+    def _entrances(self):
+        """
+        Yields (cell, cell) pairs of transitions across cluster borders.
+        """
+        maze = self.maze
+        grid = maze.grid
+        size = self.cluster_size
+
+        # Vertical borders, then horizontal ones, as (border cells along
+        # the first cluster's edge, step across the border)
+        borders = []
+        for col in range(size, maze.width, size):
+            for top in range(0, maze.height, size):
+                cells = [maze.index((r, col - 1)) for r in range(top, min(top + size, maze.height))]
+                borders.append((cells, 1))
+        for row in range(size, maze.height, size):
+            for left in range(0, maze.width, size):
+                cells = [maze.index((row - 1, c)) for c in range(left, min(left + size, maze.width))]
+                borders.append((cells, maze.stride))
+
+        for cells, step in borders:
+            run = []
+            for cell in cells + [None]:
+                if cell is not None and not grid[cell] and not grid[cell + step]:
+                    run.append(cell)
+                    continue
+                if len(run) >= LONG_ENTRANCE:
+                    yield run[0], run[0] + step
+                    yield run[-1], run[-1] + step
+                elif run:
+                    middle = run[len(run) // 2]
+                    yield middle, middle + step
+                run = []
+
+    def members(self):
+        """
+        Returns a dict mapping each cluster to the list of its nodes.
+        """
+        if self._members is None:
+            self._members = {}
+            for n, cell in enumerate(self.nodes):
+                self._members.setdefault(self.cluster_of(cell), []).append(n)
+        return self._members
+
+    def cluster_of(self, cell):
+        row, col = self.maze.cell(cell)
+        return (row // self.cluster_size, col // self.cluster_size)
+
+    def _local_grid(self, cluster):
+        """
+        Returns a copy of one cluster's cells walled in on every side, as
+        (grid, stride, first cell index), reusing the last cluster's copy.
+        """
+        if self._local is not None and self._local[0] == cluster:
+            return self._local[1]
+        maze = self.maze
+        size = self.cluster_size
+        top = cluster[0] * size
+        left = cluster[1] * size
+        height = min(top + size, maze.height) - top
+        width = min(left + size, maze.width) - left
+        stride = width + 2
+        grid = bytearray([1]) * (stride * (height + 2))
+        for r in range(height):
+            first = maze.index((top + r, left))
+            grid[(r + 1) * stride + 1:(r + 1) * stride + 1 + width] = maze.grid[first:first + width]
+        local = (grid, stride, maze.index((top, left)))
+        self._local = (cluster, local)
+        return local
+
+    def _local_search(self, cluster, source):
+        """
+        BFS from source confined to a cluster. Returns the distance array
+        over the cluster's local grid (-1 where unreached) and a function
+        from maze cells to local indices.
+        """
+        grid, stride, first = self._local_grid(cluster)
+        maze_stride = self.maze.stride
+
+        def local(cell):
+            row, col = divmod(cell - first, maze_stride)
+            return (row + 1) * stride + col + 1
+
+        steps = (-stride, stride, -1, 1)
+        dist = array("i", [-1]) * len(grid)
+        start = local(source)
+        dist[start] = 0
+        frontier = [start]
+        d = 0
+        reached = 1
+        while frontier:
+            d += 1
+            next_frontier = []
+            for cell in frontier:
+                for step in steps:
+                    neighbor = cell + step
+                    if not grid[neighbor] and dist[neighbor] < 0:
+                        dist[neighbor] = d
+                        next_frontier.append(neighbor)
+            reached += len(next_frontier)
+            frontier = next_frontier
+        self.num_explored += reached
+        return dist, local
+
+    def _local_distances(self, cluster, source, cells):
+        """
+        Returns a dict of cell -> distance from source without leaving
+        the cluster, for those of cells that are reachable.
+        """
+        dist, local = self._local_search(cluster, source)
+        found = {}
+        for cell in cells:
+            d = dist[local(cell)]
+            if d >= 0:
+                found[cell] = d
+        return found
+
+    def _local_path(self, cluster, source, target):
+        """
+        Returns the list of cells of a shortest path from source to
+        target inside a cluster, walked back from target.
+        """
+        maze = self.maze
+        dist, local = self._local_search(cluster, source)
+        path = [target]
+        cell = target
+        d = dist[local(target)]
+        while d > 0:
+            d -= 1
+            for _, offset in maze.offsets:
+                neighbor = cell + offset
+                if not maze.grid[neighbor] and self.cluster_of(neighbor) == cluster \
+                        and dist[local(neighbor)] == d:
+                    cell = neighbor
+                    break
+            path.append(cell)
+        path.reverse()
+        return path
+
+    def path(self, start, goal):
+        """
+        Returns the (actions, cells) solution between two (row, col)
+        states, or None if the goal cannot be reached.
+        """
+        maze = self.maze
+        self.num_explored = 0
+        s = maze.index(start)
+        t = maze.index(goal)
+        if s == t:
+            return ([], [])
+
+        # Connect the start and goal to the nodes of their clusters, as
+        # two extra nodes numbered after the abstract graph
+        n = len(self.nodes)
+        source, target = n, n + 1
+        nodes = self.nodes
+
+        def cell_of(v):
+            return nodes[v] if v < n else (s, t)[v - n]
+
+        start_cluster = self.cluster_of(s)
+        goal_cluster = self.cluster_of(t)
+        from_start = self._connections(start_cluster, s)
+        to_goal = dict(self._connections(goal_cluster, t))
+        if start_cluster == goal_cluster:
+            d = self._local_distances(start_cluster, s, [t])
+            if t in d:
+                from_start.append((target, d[t]))
+
+        goal_row, goal_col = goal
+        cost = {source: 0}
+        parent = {source: None}
+        heap = [(0, 0, source)]
+        closed = set()
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            self.num_explored += 1
+            if u == target:
+                break
+            if u == source:
+                neighbors = from_start
+            else:
+                neighbors = [
+                    (self.targets[k], self.costs[k])
+                    for k in range(self.offsets[u], self.offsets[u + 1])
+                ]
+                if u in to_goal:
+                    neighbors.append((target, to_goal[u]))
+            for v, c in neighbors:
+                if v in closed or cost.get(v, g + c + 1) <= g + c:
+                    continue
+                cost[v] = g + c
+                parent[v] = u
+                row, col = maze.cell(cell_of(v))
+                h = abs(row - goal_row) + abs(col - goal_col)
+                heapq.heappush(heap, (g + c + h, g + c, v))
+        if target not in closed:
+            return None
+
+        # Refine each abstract edge into cells
+        waypoints = []
+        u = target
+        while u is not None:
+            waypoints.append(cell_of(u))
+            u = parent[u]
+        waypoints.reverse()
+        return self._refine(waypoints)
+
+    def _connections(self, cluster, cell):
+        """
+        Returns (node, distance) pairs for the nodes of a cluster
+        reachable from cell without leaving it.
+        """
+        members = self.members().get(cluster, [])
+        dist = self._local_distances(cluster, cell, [self.nodes[n] for n in members])
+        return [(n, dist[self.nodes[n]]) for n in members if self.nodes[n] in dist]
+
+    def _refine(self, waypoints):
+        maze = self.maze
+        names = {offset: action for action, offset in maze.offsets}
+        actions = []
+        cells = []
+        for a, b in zip(waypoints, waypoints[1:]):
+            if a == b:
+                continue
+            if b - a in names:
+                steps = [a, b]
+            else:
+                steps = self._local_path(self.cluster_of(a), a, b)
+            for previous, cell in zip(steps, steps[1:]):
+                actions.append(names[cell - previous])
+                cells.append(maze.cell(cell))
+        return (actions, cells)
+
+    def save(self, filename):
+        """
+        Writes the abstract graph next to a checksum of the maze it
+        was built for.
+        """
+        maze = self.maze
+        with open(filename, "wb") as f:
+            f.write(MAGIC)
+            array("q", [
+                maze.height, maze.width, self.cluster_size, zlib.crc32(maze.grid),
+                len(self.nodes), len(self.targets),
+            ]).tofile(f)
+            for values in (self.nodes, self.offsets, self.targets, self.costs):
+                values.tofile(f)
+
+    @classmethod
+    def load(cls, maze, filename):
+        """
+        Loads an abstract graph saved for this maze, or returns None if
+        the file is missing or belongs to another maze.
+        """
+        try:
+            f = open(filename, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            header = array("q")
+            header.fromfile(f, 6)
+            height, width, cluster_size, checksum, nodes, edges = header
+            if [height, width, checksum] != [maze.height, maze.width, zlib.crc32(maze.grid)]:
+                return None
+            hierarchy = cls(maze, cluster_size, build=False)
+            hierarchy.nodes.fromfile(f, nodes)
+            hierarchy.offsets = array("q")
+            hierarchy.offsets.fromfile(f, nodes + 1)
+            hierarchy.targets.fromfile(f, edges)
+            hierarchy.costs.fromfile(f, edges)
+        return hierarchy
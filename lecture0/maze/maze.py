@@ -1,4 +1,17 @@
-import sys
+import argparse
+import heapq
+import itertools
+import mmap
+import os
+import time
+import zlib
+from array import array
+from collections import deque
+
+from hpa import Hierarchy
+
+# Search strategies accepted by Maze.solve
+METHODS = ("dfs", "bfs", "greedy", "astar", "dijkstra", "jps", "field", "hpa")
 
 
 class Node():
@@ -9,14 +22,21 @@ class Node():
 
 
 class StackFrontier():
+    """
+    Frontier backed by a deque, with a count of queued nodes per state
+    so that contains_state is a hash lookup.
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self._track(node)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -25,10 +45,20 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._untrack(node)
             return node
 
+    def _track(self, node):
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _untrack(self, node):
+        count = self.states[node.state]
+        if count == 1:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count - 1
+
 
 class QueueFrontier(StackFrontier):
 
@@ -36,58 +66,194 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._untrack(node)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier backed by a heap that removes the node with the lowest
+    priority first, and the earliest added among equal priorities.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = itertools.count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self._track(node)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._untrack(node)
             return node
 
 
+# Moves as (action, row change, column change), in expansion order
+MOVES = (("up", -1, 0), ("down", 1, 0), ("left", 0, -1), ("right", 0, 1))
+
+# DistanceField move for cells with no path to the goal
+NO_MOVE = 255
+
+# Colors of the images written by Maze.output_image, by palette index
+PALETTE = (
+    (237, 240, 252),  # empty cell
+    (40, 40, 40),  # wall
+    (255, 0, 0),  # start
+    (0, 171, 28),  # goal
+    (220, 235, 113),  # solution
+    (212, 97, 85),  # explored
+    (0, 0, 0),  # border
+)
+EMPTY, WALL, START, GOAL, SOLUTION, EXPLORED, BORDER = range(len(PALETTE))
+
+# Maps wall + 2 * explored to a palette index
+CELL_COLORS = bytes([EMPTY, WALL, EXPLORED, WALL]).ljust(256, b"\0")
+
+# Maps each byte of a maze file to 1 for a wall and 0 for an open cell
+WALL_BYTES = bytes(0 if chr(b) in " AB" else 1 for b in range(256))
+
+
+def line_spans(contents):
+    """
+    Returns the (start, end) byte offsets of every line in contents,
+    flattened into one array. Lines end at a newline, optionally after a
+    carriage return, and a final newline does not start another line.
+    """
+    spans = array("q")
+    start = 0
+    size = len(contents)
+    while start < size:
+        end = contents.find(b"\n", start)
+        if end == -1:
+            end = size
+        next_start = end + 1
+        if end > start and contents[end - 1] == 13:
+            end -= 1
+        spans.append(start)
+        spans.append(end)
+        start = next_start
+    return spans
+
+
 class Maze():
+    """
+    A maze read from a text file.
+
+    The walls are kept in a bytearray with one byte per cell, 1 for a
+    wall, surrounded by a border of walls. Cells are numbered row by row
+    across that padded grid, so the neighbors of cell i are i - stride,
+    i + stride, i - 1 and i + 1 without any bounds checks. Searches work
+    on these indexes; states passed in and out are (row, col) tuples.
+    """
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+        # Memory-map the file and find where each line starts and ends
+        with open(filename, "rb") as f:
+            try:
+                contents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                contents = b""
+        try:
+            self._parse(contents)
+        finally:
+            if isinstance(contents, mmap.mmap):
+                contents.close()
+
+    @classmethod
+    def from_text(cls, text):
+        """Builds a maze from its text instead of a file."""
+        maze = cls.__new__(cls)
+        maze._parse(text.encode("utf-8"))
+        return maze
+
+    def _parse(self, contents):
+        spans = line_spans(contents)
 
-        # Validate start and goal
-        if contents.count("A") != 1:
+        # Determine height and width of maze
+        self.height = len(spans) // 2
+        self.width = 0
+        for i in range(0, len(spans), 2):
+            line = contents[spans[i]:spans[i + 1]]
+            width = len(line) if line.isascii() else len(line.decode("utf-8"))
+            self.width = max(self.width, width)
+        self.stride = self.width + 2
+
+        # Keep track of walls one row at a time, leaving the end of short
+        # lines open, and validate start and goal on the way
+        self.grid = bytearray([1]) * (self.stride * (self.height + 2))
+        starts = []
+        goals = []
+        for i in range(self.height):
+            line = contents[spans[2 * i]:spans[2 * i + 1]]
+            if line.isascii():
+                row = line.translate(WALL_BYTES)
+            else:
+                line = line.decode("utf-8")
+                row = bytes(0 if c in " AB" else 1 for c in line)
+            first = self.index((i, 0))
+            self.grid[first:first + self.width] = row.ljust(self.width, b"\0")
+            a, b = (b"A", b"B") if isinstance(line, bytes) else ("A", "B")
+            starts.extend([(i, line.find(a))] * line.count(a))
+            goals.extend([(i, line.find(b))] * line.count(b))
+
+        if len(starts) != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if len(goals) != 1:
             raise Exception("maze must have exactly one goal")
+        self.start = starts[0]
+        self.goal = goals[0]
 
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Index change of each move on the padded grid
+        self.offsets = tuple(
+            (action, dr * self.stride + dc) for action, dr, dc in MOVES
+        )
 
         self.solution = None
+        self.visited = None
+        self.field = None
+        self.hierarchy = None
+
+    def index(self, state):
+        """Returns the cell index of a (row, col) state."""
+        return (state[0] + 1) * self.stride + state[1] + 1
+
+    def cell(self, index):
+        """Returns the (row, col) state of a cell index."""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def is_wall(self, state):
+        return self.grid[self.index(state)] == 1
+
+    @property
+    def walls(self):
+        """The walls as a list of rows of booleans."""
+        return [
+            [b == 1 for b in self.grid[self.index((i, 0)):self.index((i, self.width))]]
+            for i in range(self.height)
+        ]
+
+    @property
+    def explored(self):
+        """The set of (row, col) states explored by the last solve."""
+        if self.visited is None:
+            return set()
+        return {self.cell(i) for i in range(len(self.visited)) if self.visited[i]}
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
+        for i in range(self.height):
+            for j in range(self.width):
+                if self.is_wall((i, j)):
                     print("█", end="")
                 elif (i, j) == self.start:
                     print("A", end="")
@@ -101,33 +267,83 @@ class Maze():
         print()
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        index = self.index(state)
+        return [
+            (action, self.cell(index + offset))
+            for action, offset in self.offsets
+            if not self.grid[index + offset]
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
-
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def solve(self, method="dfs"):
+        """
+        Finds a solution to maze, if one exists.
+
+        method is one of METHODS: "dfs" and "bfs" search depth- and
+        breadth-first, "greedy" always expands the state closest to the
+        goal by Manhattan distance, "astar" orders states by path cost
+        plus that distance and "dijkstra" by path cost alone. "jps" runs
+        A* over jump points only, skipping the symmetric paths of open
+        areas. bfs, astar, dijkstra and jps find shortest paths. "field"
+        follows the goal's DistanceField, building it on first use, so
+        later calls for other starts need no search. "hpa" plans on the
+        maze's cluster Hierarchy, built on first use, and finds paths
+        close to, but not always, the shortest.
+
+        Sets num_explored and elapsed, the wall time in seconds.
+        """
+        if method not in METHODS:
+            raise ValueError(f"unknown method: {method}")
+        start_time = time.perf_counter()
+        try:
+            if method in ("dfs", "bfs"):
+                self._solve_uninformed(StackFrontier() if method == "dfs" else QueueFrontier())
+            elif method == "jps":
+                self._solve_jump_points()
+            elif method == "field":
+                self.num_explored = 0
+                self.visited = None
+                if self.field is None:
+                    self.field = DistanceField(self)
+                    self.num_explored = self.field.reached
+                self.solution = self.field.path(self.start)
+                if self.solution is None:
+                    raise Exception("no solution")
+            elif method == "hpa":
+                self.visited = None
+                if self.hierarchy is None:
+                    self.hierarchy = Hierarchy(self)
+                    built = self.hierarchy.reached
+                else:
+                    built = 0
+                self.solution = self.hierarchy.path(self.start, self.goal)
+                self.num_explored = built + self.hierarchy.num_explored
+                if self.solution is None:
+                    raise Exception("no solution")
+            else:
+                self._solve_best_first(method)
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+
+    def _solve_uninformed(self, frontier):
+        grid = self.grid
+        offsets = self.offsets
+        goal = self.index(self.goal)
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        start = Node(state=self.index(self.start), parent=None, action=None)
         frontier.add(start)
 
         # Initialize an empty explored set
-        self.explored = set()
+        self.visited = visited = bytearray(len(grid))
+        reached = bytearray(len(grid))
+        reached[start.state] = 1
 
         # Keep looping until solution found
         while True:
@@ -141,87 +357,442 @@ class Maze():
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+            if node.state == goal:
+                self._set_solution(node)
                 return
 
             # Mark node as explored
-            self.explored.add(node.state)
-
-            # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
+            visited[node.state] = 1
+
+            # Add neighbors to frontier. Every state ever added is either
+            # still in the frontier or explored, so one mark covers both
+            for action, offset in offsets:
+                state = node.state + offset
+                if grid[state] or reached[state]:
+                    continue
+                reached[state] = 1
+                frontier.add(Node(state=state, parent=node, action=action))
+
+    def _solve_best_first(self, method):
+        grid = self.grid
+        offsets = self.offsets
+        goal = self.index(self.goal)
+        self.num_explored = 0
+        self.visited = visited = bytearray(len(grid))
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
+        # Cheapest known number of steps to each cell, -1 if not reached
+        cost = array("i", [-1]) * len(grid)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
+        frontier = PriorityFrontier()
+        start = self.index(self.start)
+        cost[start] = 0
+        frontier.add(Node(state=start, parent=None, action=None),
+                     self._priority(method, start, 0))
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+            node = frontier.remove()
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+            # A state queued again at a lower cost leaves a stale copy behind
+            if visited[node.state]:
+                continue
+            self.num_explored += 1
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+            if node.state == goal:
+                self._set_solution(node)
+                return
+            visited[node.state] = 1
+
+            steps = cost[node.state] + 1
+            for action, offset in offsets:
+                state = node.state + offset
+                if grid[state] or visited[state]:
+                    continue
+                if method == "greedy":
+                    if frontier.contains_state(state):
+                        continue
+                elif cost[state] != -1 and cost[state] <= steps:
+                    continue
+                cost[state] = steps
+                child = Node(state=state, parent=node, action=action)
+                frontier.add(child, self._priority(method, state, steps))
+
+    def _priority(self, method, index, steps):
+        if method == "dijkstra":
+            return steps
+        row, col = divmod(index, self.stride)
+        h = abs(row - 1 - self.goal[0]) + abs(col - 1 - self.goal[1])
+        if method == "greedy":
+            return h
+
+        # Among equal estimates, prefer states closer to the goal
+        return (steps + h, h)
+
+    def _solve_jump_points(self):
+        """
+        Jump Point Search for the 4-connected grid.
+
+        Among equally short paths, only those that turn at the few cells
+        where a wall ends beside them (or where a horizontal scan from a
+        vertical run finds such a cell) are followed. Straight runs are
+        scanned without being queued, and each node in the frontier is a
+        jump point with the direction it was reached from.
+        """
+        grid = self.grid
+        goal = self.index(self.goal)
+        self.num_explored = 0
+        self.visited = visited = bytearray(len(grid))
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+        # Cheapest known number of steps to each jump point
+        cost = {}
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        frontier = PriorityFrontier()
+        start = self.index(self.start)
+        cost[start] = 0
+        frontier.add(Node(state=start, parent=None, action=None),
+                     self._priority("astar", start, 0))
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
+        while True:
+            if frontier.empty():
+                raise Exception("no solution")
+            node = frontier.remove()
+            if visited[node.state]:
+                continue
+            self.num_explored += 1
 
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
+            if node.state == goal:
+                self._set_jump_solution(node)
+                return
+            visited[node.state] = 1
+
+            for offset in self._jump_directions(node):
+                if grid[node.state + offset]:
+                    continue
+                state = self._jump(node.state, offset, goal)
+                if state is None or visited[state]:
+                    continue
+                steps = cost[node.state] + self._run_length(node.state, state)
+                if state in cost and cost[state] <= steps:
+                    continue
+                cost[state] = steps
+                child = Node(state=state, parent=node, action=offset)
+                frontier.add(child, self._priority("astar", state, steps))
+
+    def _jump_directions(self, node):
+        """
+        Returns the offsets worth searching from a jump point: all four
+        at the start, otherwise straight on and both perpendicular turns.
+        """
+        stride = self.stride
+        if node.action is None:
+            return (-stride, stride, -1, 1)
+        if node.action in (-1, 1):
+            return (node.action, -stride, stride)
+        return (node.action, -1, 1)
+
+    def _jump(self, index, offset, goal):
+        """
+        Walks from index by offset and returns the next jump point,
+        or None if a wall is reached first.
+
+        A cell is a jump point if it is the goal, if a cell beside it is
+        open while the one beside the previous cell is a wall, or, on a
+        vertical run, if a horizontal run from it finds a jump point.
+        """
+        if offset in (-1, 1):
+            return self._jump_row(index, offset, goal)
+        grid = self.grid
+        while True:
+            index += offset
+            if grid[index]:
+                return None
+            if index == goal:
+                return index
+            if ((not grid[index + 1] and grid[index + 1 - offset])
+                    or (not grid[index - 1] and grid[index - 1 - offset])):
+                return index
+            if (self._jump_row(index, 1, goal) is not None
+                    or self._jump_row(index, -1, goal) is not None):
+                return index
+
+    def _jump_row(self, index, offset, goal):
+        """
+        Horizontal case of _jump, searched with bytearray.find rather
+        than cell by cell: the run ends at the next wall in the row, and
+        the first jump point before it is the goal or the first cell
+        whose neighbor above or below starts an opening after a wall.
+        """
+        grid = self.grid
+        stride = self.stride
+        if offset == 1:
+            wall = grid.find(1, index + 1)
+            best = goal if index < goal < wall else wall
+            p = grid.find(b"\x01\x00", index - stride, best - stride)
+            if p >= 0:
+                best = p + 1 + stride
+            p = grid.find(b"\x01\x00", index + stride, best + stride)
+            if p >= 0:
+                best = p + 1 - stride
+        else:
+            wall = grid.rfind(1, 0, index)
+            best = goal if wall < goal < index else wall
+            p = grid.rfind(b"\x00\x01", best + 1 - stride, index + 1 - stride)
+            if p >= 0:
+                best = p + stride
+            p = grid.rfind(b"\x00\x01", best + 1 + stride, index + 1 + stride)
+            if p >= 0:
+                best = p - stride
+        return None if best == wall else best
+
+    def _run_length(self, a, b):
+        """Number of steps along the straight run between two cells."""
+        d = abs(b - a)
+        return d // self.stride if d % self.stride == 0 else d
+
+    def _set_jump_solution(self, node):
+        names = {offset: action for action, offset in self.offsets}
+        actions = []
+        cells = []
+        while node.parent is not None:
+            for index in range(node.state, node.parent.state, -node.action):
+                actions.append(names[node.action])
+                cells.append(self.cell(index))
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+    def _set_solution(self, node):
+        actions = []
+        cells = []
+        while node.parent is not None:
+            actions.append(node.action)
+            cells.append(self.cell(node.state))
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2, tile=None):
+        """
+        Saves the maze as a palette image with cell_size pixels per cell.
+
+        Every cell becomes one palette index, so the image is built from
+        the grid in bulk and scaled up in a single resize rather than
+        drawn cell by cell. If tile is set, the maze is split into tiles
+        of at most tile x tile cells saved as name_ROW_COL.ext, to keep
+        each canvas small for huge mazes.
+        """
+        colors = self.cell_colors(show_solution, show_explored)
+        if tile is None:
+            self._output_tile(filename, colors, 0, 0, self.height, self.width,
+                              cell_size, cell_border)
+            return
+        name, ext = os.path.splitext(filename)
+        for top in range(0, self.height, tile):
+            for left in range(0, self.width, tile):
+                self._output_tile(
+                    f"{name}_{top // tile}_{left // tile}{ext}", colors,
+                    top, left, min(tile, self.height - top), min(tile, self.width - left),
+                    cell_size, cell_border
                 )
 
-        img.save(filename)
+    def cell_colors(self, show_solution=True, show_explored=False):
+        """
+        Returns a bytearray holding the PALETTE index of every cell of
+        the padded grid.
+        """
+        solved = self.solution is not None
+
+        # Walls are 1 and explored cells 2 in the sum, with no carries
+        # since both are 0 or 1 in every byte
+        size = len(self.grid)
+        if solved and show_explored and self.visited is not None:
+            visited = self.visited
+        else:
+            visited = bytes(size)
+        combined = int.from_bytes(self.grid, "little") + 2 * int.from_bytes(visited, "little")
+        colors = bytearray(combined.to_bytes(size, "little").translate(CELL_COLORS))
+
+        if solved and show_solution:
+            for cell in self.solution[1]:
+                colors[self.index(cell)] = SOLUTION
+        colors[self.index(self.start)] = START
+        colors[self.index(self.goal)] = GOAL
+        return colors
+
+    def _output_tile(self, filename, colors, top, left, height, width,
+                     cell_size, cell_border):
+        from PIL import Image, ImageDraw
 
+        rows = b"".join(
+            colors[self.index((i, left)):self.index((i, left + width))]
+            for i in range(top, top + height)
+        )
+        img = Image.frombytes("P", (width, height), rows)
+        img.putpalette([channel for color in PALETTE for channel in color])
+        img = img.resize((width * cell_size, height * cell_size), Image.NEAREST)
+
+        # Cell borders, as one rectangle per grid line
+        if cell_border:
+            draw = ImageDraw.Draw(img)
+            for j in range(width + 1):
+                x = j * cell_size
+                draw.rectangle([(x - cell_border, 0), (x + cell_border - 1, img.height)],
+                               fill=BORDER)
+            for i in range(height + 1):
+                y = i * cell_size
+                draw.rectangle([(0, y - cell_border), (img.width, y + cell_border - 1)],
+                               fill=BORDER)
+
+        img.save(filename)
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
 
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+class DistanceField():
+    """
+    Distance to the goal of every cell of a Maze, from one reverse
+    breadth-first search, with the first move of a shortest path from
+    each cell. The path from any start is then read off in O(length).
+    """
+
+    MAGIC = b"MAZEDST1"
+
+    def __init__(self, maze, search=True):
+        self.maze = maze
+        size = len(maze.grid)
+
+        # Steps to the goal, -1 if unreachable
+        self.dist = array("i", [-1]) * size
+
+        # Index into MOVES of the first step towards the goal, NO_MOVE if none
+        self.moves = bytearray([NO_MOVE]) * size
+        self.reached = 0
+        if search:
+            self._search()
+
+    def _search(self):
+        grid = self.maze.grid
+        dist = self.dist
+        moves = self.moves
+        goal = self.maze.index(self.maze.goal)
+
+        # Reaching cell + offset from cell means its next step is the
+        # opposite move, back to cell
+        offsets = [offset for _, offset in self.maze.offsets]
+        back = [(offset, offsets.index(-offset)) for offset in offsets]
+
+        dist[goal] = 0
+        frontier = [goal]
+        depth = 0
+        while frontier:
+            self.reached += len(frontier)
+            depth += 1
+            next_frontier = []
+            for cell in frontier:
+                for offset, move in back:
+                    neighbor = cell + offset
+                    if grid[neighbor] or dist[neighbor] != -1:
+                        continue
+                    dist[neighbor] = depth
+                    moves[neighbor] = move
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+
+    def distance(self, state):
+        """Returns the number of steps from state to the goal, or None."""
+        d = self.dist[self.maze.index(state)]
+        return None if d == -1 else d
+
+    def path(self, start):
+        """
+        Returns the (actions, cells) solution from a (row, col) start to
+        the goal, or None if the goal cannot be reached.
+        """
+        maze = self.maze
+        index = maze.index(start)
+        if self.dist[index] == -1:
+            return None
+        actions = []
+        cells = []
+        while self.dist[index] != 0:
+            action, offset = maze.offsets[self.moves[index]]
+            index += offset
+            actions.append(action)
+            cells.append(maze.cell(index))
+        return (actions, cells)
+
+    def save(self, filename):
+        """
+        Writes the field next to a checksum of the maze it belongs to.
+        """
+        maze = self.maze
+        with open(filename, "wb") as f:
+            f.write(self.MAGIC)
+            array("q", [maze.height, maze.width, *maze.goal, zlib.crc32(maze.grid)]).tofile(f)
+            self.dist.tofile(f)
+            f.write(self.moves)
+
+    @classmethod
+    def load(cls, maze, filename):
+        """
+        Loads a field saved for this maze and goal, or returns None if
+        the file is missing or belongs to another maze.
+        """
+        try:
+            f = open(filename, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                return None
+            header = array("q")
+            header.fromfile(f, 5)
+            if list(header) != [maze.height, maze.width, *maze.goal, zlib.crc32(maze.grid)]:
+                return None
+            field = cls(maze, search=False)
+            field.dist = array("i")
+            field.dist.fromfile(f, len(maze.grid))
+            field.moves = bytearray(f.read(len(maze.grid)))
+        return field
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python maze.py maze.txt [--method METHOD]")
+    parser.add_argument("filename")
+    parser.add_argument("--method", choices=METHODS, default="dfs",
+                        help="search strategy")
+    parser.add_argument("--cell-size", type=int, default=50,
+                        help="pixels per cell in maze.png")
+    parser.add_argument("--tile", type=int,
+                        help="split the image into tiles of this many cells per side")
+    parser.add_argument("--field",
+                        help="distance field file for the field method, reused if it matches")
+    parser.add_argument("--hierarchy",
+                        help="cluster hierarchy file for the hpa method, reused if it matches")
+    args = parser.parse_args()
+
+    m = Maze(args.filename)
+    if args.method == "field" and args.field:
+        m.field = DistanceField.load(m, args.field)
+    if args.method == "hpa" and args.hierarchy:
+        m.hierarchy = Hierarchy.load(m, args.hierarchy)
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.method)
+    print("States Explored:", m.num_explored)
+    print(f"Time: {m.elapsed * 1000:.3f} ms")
+    if args.method == "field" and args.field and m.num_explored:
+        m.field.save(args.field)
+    if args.method == "hpa" and args.hierarchy and m.hierarchy.reached:
+        m.hierarchy.save(args.hierarchy)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True, cell_size=args.cell_size,
+                   cell_border=min(2, args.cell_size // 10), tile=args.tile)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,57 @@ Tic Tac Toe Player
 """
 
 import math
-from copy import deepcopy
 
 X = "X"
 O = "O"
 EMPTY = None
 
+rows = 3
+columns = 3
+
+# The engine keeps a board as two 9-bit ints, the cells of X and of O,
+# with cell (i, j) at bit 3 * i + j
+FULL = (1 << 9) - 1
+
+# Rows, columns and diagonals, as bit masks
+WIN_MASKS = (
+    [sum(1 << (3 * i + j) for j in range(3)) for i in range(3)]
+    + [sum(1 << (3 * i + j) for i in range(3)) for j in range(3)]
+    + [sum(1 << (4 * i) for i in range(3)), sum(1 << (2 * i + 2) for i in range(3))]
+)
+
+# Number of set bits in each 9-bit mask
+POPCOUNT = [bin(bits).count("1") for bits in range(FULL + 1)]
+
+# Flags of transposition table entries: the stored value is exact, or
+# only a lower or upper bound because the search was cut off
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Canonical bitboard -> (flag, value), shared by all searches
+table = {}
+table_stats = {"probes": 0, "hits": 0}
+
+# Cell orders of the 8 rotations and reflections of the board, as
+# indices into the row-major cells
+SYMMETRIES = []
+for _cells in (
+    [(i, j) for i in range(3) for j in range(3)],
+    [(j, 2 - i) for i in range(3) for j in range(3)],
+    [(2 - i, 2 - j) for i in range(3) for j in range(3)],
+    [(2 - j, i) for i in range(3) for j in range(3)],
+):
+    SYMMETRIES.append(tuple(3 * i + j for i, j in _cells))
+    SYMMETRIES.append(tuple(3 * i + 2 - j for i, j in _cells))
+
+# For each symmetry, the image of every 9-bit mask
+SYMMETRY_MASKS = [
+    [sum(1 << k for k, source in enumerate(order) if bits >> source & 1)
+     for bits in range(FULL + 1)]
+    for order in SYMMETRIES
+]
+
 
 def initial_state():
     """
@@ -18,143 +63,213 @@ def initial_state():
                    [EMPTY, EMPTY, EMPTY],
                    [EMPTY, EMPTY, EMPTY]]
 
-    global rows
-    rows = len(empty_board)
-
-    global columns
-    columns = len(empty_board[0])
-
     return empty_board
 
 
-def player(board):
+def to_bits(board):
     """
-    Returns player who has the next turn on a board.
+    Returns the (x, o) bitboards of a board.
     """
-    count_X = 0
-    count_O = 0
-
+    x = o = 0
     for i in range(rows):
         for j in range(columns):
             if board[i][j] == X:
-                count_X += 1
+                x |= 1 << (3 * i + j)
             elif board[i][j] == O:
-                count_O += 1
+                o |= 1 << (3 * i + j)
+    return x, o
 
-    return X if (count_X <= count_O) else O
 
+def from_bits(x, o):
+    """
+    Returns the board of (x, o) bitboards.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(columns)]
+        for i in range(rows)
+    ]
 
-def actions(board):
+
+def bits_player(x, o):
+    return X if POPCOUNT[x] <= POPCOUNT[o] else O
+
+
+def bits_winner(x, o):
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def bits_utility(x, o):
     """
-    Returns set of all possible actions (i, j) available on the board.
+    Returns 1 if X has won, -1 if O has won, 0 for a full board without
+    a winner, and None if the game is not over.
     """
+    for mask in WIN_MASKS:
+        if x & mask == mask:
+            return 1
+        if o & mask == mask:
+            return -1
+    if x | o == FULL:
+        return 0
+    return None
 
-    empty_cells = set()
 
-    for i in range(rows):
-        for j in range(columns):
-            if board[i][j] == EMPTY:
-                empty_cells.add((i, j))
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return bits_player(*to_bits(board))
+
 
-    return empty_cells
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = to_bits(board)
+    empty = FULL & ~(x | o)
+    return {divmod(k, 3) for k in range(9) if empty >> k & 1}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    i, j = actions
-    new_board = deepcopy(board)
+    i, j = action
+    if not 0 <= i < rows or not 0 <= j < columns:
+        raise Exception("Invalid action.")
+
+    x, o = to_bits(board)
+    cell = 1 << (3 * i + j)
 
-    if new_board[i][j] is not EMPTY:
+    if (x | o) & cell:
         raise Exception("Invalid action.")
+    elif bits_player(x, o) == X:
+        x |= cell
     else:
-        new_board[i][j] = player(new_board)
+        o |= cell
 
-    return new_board
+    return from_bits(x, o)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-
-    # Horizontal
-    for i in range(rows):
-        if all(j == board[i][0] for j in board[i]):
-            return board[i][0]
-
-    # Vertical
-    for i in range(columns):
-        if all(board[j][i] == board[0][i] for j in range(columns)):
-            return board[0][i]
-
-    # Diagonal
-    if all(board[j][j] == board[0][0] for j in range(columns)):
-        return board[0][0]
-    elif all(board[2-j][j] == board[2][0] for j in range(columns)):
-        return board[2][0]
-
-    return None
+    return bits_winner(*to_bits(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if (winner(board) or len(actions(board)) == 0):
-        return True
-    else:
-        return False
+    return bits_utility(*to_bits(board)) is not None
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if (winner(board) == X):
-        return 1
-    elif (winner(board) == O):
-        return -1
-    elif len(actions(board)) == 0:
-        return 0
+    value = bits_utility(*to_bits(board))
+    return 0 if value is None else value
 
 
-def minimax_value(board, player, alpha, beta):
-    if terminal(board):
-        return utility(board)
+def canonical(board):
+    """
+    Returns a key shared by the board and all its rotations and
+    reflections, which have the same minimax value.
+    """
+    return canonical_bits(*to_bits(board))
 
-    if player == X:
-        v = -math.inf
 
-        for action in actions(board):
-            v = max(v, minimax_value(result(board, action), O, alpha, beta))
+def canonical_bits(x, o):
+    return min(masks[x] << 9 | masks[o] for masks in SYMMETRY_MASKS)
 
-            alpha = max(alpha, v)
 
+def clear_table():
+    """
+    Empties the transposition table and its hit counters.
+    """
+    table.clear()
+    table_stats["probes"] = 0
+    table_stats["hits"] = 0
+
+
+def hit_rate():
+    """
+    Returns the fraction of table probes that answered a position
+    without searching it.
+    """
+    if not table_stats["probes"]:
+        return 0.0
+    return table_stats["hits"] / table_stats["probes"]
+
+
+def minimax_value(board, player, alpha, beta):
+    x, o = to_bits(board)
+    return bits_value(x, o, player == X, alpha, beta)
+
+
+def bits_value(x, o, x_to_move, alpha, beta):
+    value = bits_utility(x, o)
+    if value is not None:
+        return value
+
+    key = canonical_bits(x, o)
+    table_stats["probes"] += 1
+    entry = table.get(key)
+    if entry is not None:
+        flag, value = entry
+        if (flag == EXACT or (flag == LOWER and value >= beta)
+                or (flag == UPPER and value <= alpha)):
+            table_stats["hits"] += 1
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+    alpha_start = alpha
+    beta_start = beta
+
+    empty = FULL & ~(x | o)
+    if x_to_move:
+        v = -math.inf
+        while empty:
+            cell = empty & -empty
+            empty ^= cell
+            v = max(v, bits_value(x | cell, o, False, alpha, beta))
+            alpha = max(alpha, v)
             if alpha >= beta:
                 break
-
-        return v
     else:
         v = math.inf
-
-        for action in actions(board):
-            v = min(v, minimax_value(result(board, action), X, alpha, beta))
-
+        while empty:
+            cell = empty & -empty
+            empty ^= cell
+            v = min(v, bits_value(x, o | cell, True, alpha, beta))
             beta = min(beta, v)
-
             if alpha >= beta:
                 break
 
-        return v
+    if v <= alpha_start:
+        table[key] = (UPPER, v)
+    elif v >= beta_start:
+        table[key] = (LOWER, v)
+    else:
+        table[key] = (EXACT, v)
+    return v
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board):
+    x, o = to_bits(board)
+    if bits_utility(x, o) is not None:
         return None
 
     optimail_move = None
@@ -162,24 +277,31 @@ def minimax(board):
     alpha = -math.inf
     beta = math.inf
 
-    if player(board) is X:
+    empty = FULL & ~(x | o)
+    moves = [k for k in range(9) if empty >> k & 1]
+
+    if bits_player(x, o) is X:
         v = -math.inf
 
-        for action in actions(board):
-            new_v = minimax_value(result(board, action), O)
+        for k in moves:
+            new_v = bits_value(x | 1 << k, o, False, alpha, beta)
 
             if new_v > v:
                 v = new_v
-                optimail_move = action
+                optimail_move = divmod(k, 3)
+
+            alpha = max(alpha, v)
     else:
         v = math.inf
 
-        for action in actions(board):
-            new_v = minimax_value(result(board, action), X)
+        for k in moves:
+            new_v = bits_value(x, o | 1 << k, True, alpha, beta)
 
             if new_v < v:
                 v = new_v
-                optimail_move = action
+                optimail_move = divmod(k, 3)
+
+            beta = min(beta, v)
 
     return optimail_move
 